@@ -0,0 +1,269 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, MutableMapping, Sequence
+
+# Dense indices and match entries are C ints ("i", 32-bit); -1 means "none"
+NO_MATCH = -1
+
+
+def _index(ids, key):
+    """
+    Dense index of `key` in the sorted id array `ids`; KeyError if absent.
+    """
+    index = bisect_left(ids, key)
+    if index == len(ids) or ids[index] != key:
+        raise KeyError(key)
+    return index
+
+
+class CSRGraph:
+    """
+    The matching graph in compressed sparse row form.
+
+    User and slot ids are remapped to dense indices 0..n-1 in ascending id
+    order, so `user_ids` and `slot_ids` map indices back and a binary search
+    maps ids to indices; no per-id dict is kept. The preferred slots of user u
+    are targets[offsets[u]:offsets[u + 1]], and two int32 match arrays link
+    both directions: slot_match[s] = user index or -1, user_match[u] = slot
+    index or -1. A user's current slot is one array read instead of a scan
+    over slot_to_user.
+
+    `user_to_slots` and `slot_to_user` are views with the dict API of
+    build_matching_graph, reading (and writing) the arrays without copying them.
+    A user holding several slots only moves out of the one with the highest id.
+    """
+
+    __slots__ = ("user_ids", "slot_ids", "offsets", "targets", "slot_match", "user_match")
+
+    def __init__(self, user_ids, slot_ids, offsets, targets, slot_match, user_match):
+        self.user_ids = user_ids
+        self.slot_ids = slot_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.slot_match = slot_match
+        self.user_match = user_match
+
+    @classmethod
+    def from_dicts(cls, user_to_slots, slot_to_user):
+        """
+        Build the graph from build_matching_graph's (user_to_slots, slot_to_user).
+        Occupants and preferred slots missing from the other dict are added.
+        """
+        user_ids = set(user_to_slots)
+        user_ids.update(occupant for occupant in slot_to_user.values() if occupant is not None)
+        user_ids = array("q", sorted(user_ids))
+        slot_ids = set(slot_to_user)
+        for preferred in user_to_slots.values():
+            slot_ids.update(preferred)
+        slot_ids = array("q", sorted(slot_ids))
+
+        # Only needed while building
+        user_index = {user_id: index for index, user_id in enumerate(user_ids)}
+        slot_index = {slot_id: index for index, slot_id in enumerate(slot_ids)}
+
+        offsets = array("i", [0])
+        targets = array("i")
+        for user_id in user_ids:
+            targets.extend(slot_index[slot_id] for slot_id in user_to_slots.get(user_id, ()))
+            offsets.append(len(targets))
+
+        slot_match = array("i", [NO_MATCH]) * len(slot_ids)
+        user_match = array("i", [NO_MATCH]) * len(user_ids)
+        for slot, slot_id in enumerate(slot_ids):
+            occupant = slot_to_user.get(slot_id)
+            if occupant is not None:
+                slot_match[slot] = user_index[occupant]
+                user_match[user_index[occupant]] = slot
+
+        return cls(user_ids, slot_ids, offsets, targets, slot_match, user_match)
+
+    @property
+    def user_to_slots(self):
+        return UserSlotsView(self)
+
+    @property
+    def slot_to_user(self):
+        return SlotUserView(self)
+
+    def to_dicts(self):
+        """
+        Copies of the graph as (user_to_slots, slot_to_user) dicts.
+        """
+        slot_ids, targets, offsets = self.slot_ids, self.targets, self.offsets
+        return (
+            {
+                user_id: [slot_ids[slot] for slot in targets[offsets[user]:offsets[user + 1]]]
+                for user, user_id in enumerate(self.user_ids)
+            },
+            dict(self._occupants()),
+        )
+
+    def _occupants(self):
+        user_ids = self.user_ids
+        for slot_id, user in zip(self.slot_ids, self.slot_match):
+            yield slot_id, None if user == NO_MATCH else user_ids[user]
+
+    def nbytes(self):
+        """
+        Bytes held by the arrays, i.e. by the whole graph.
+        """
+        arrays = (self.user_ids, self.slot_ids, self.offsets, self.targets, self.slot_match, self.user_match)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+    def kuhn_matching(self):
+        """
+        The Kuhn engine (_kuhn_matching) on the arrays: users in descending id
+        order, preferred slots in order, occupants displaced along augmenting
+        paths. Iterative, so long chains never reach the recursion limit.
+        Returns the number of matches found.
+        """
+        offsets, targets = self.offsets, self.targets
+        slot_match, user_match = self.slot_match, self.user_match
+        visited = array("i", [NO_MATCH]) * len(self.slot_ids)   # root whose search saw the slot
+        matched = 0
+
+        for root in reversed(range(len(self.user_ids))):
+            stack = [root]              # users on the current alternating path
+            edge = [offsets[root]]      # next preference edge of each of them
+            path = []                   # slot each user on the stack is trying to take
+            found = False
+            while stack and not found:
+                user = stack[-1]
+                i, end = edge[-1], offsets[user + 1]
+                occupant = NO_MATCH
+                while i < end:
+                    slot = targets[i]
+                    i += 1
+                    if visited[slot] == root:
+                        continue
+                    visited[slot] = root
+                    occupant = slot_match[slot]
+                    if occupant != user:
+                        break
+                else:
+                    # No slot left for this user: back up to whoever tried to displace them
+                    stack.pop()
+                    edge.pop()
+                    if path:
+                        path.pop()
+                    continue
+                edge[-1] = i
+                path.append(slot)
+                if occupant == NO_MATCH:
+                    found = True
+                else:
+                    stack.append(occupant)
+                    edge.append(offsets[occupant])
+
+            if not found:
+                continue
+            # Deepest user first: each one leaves their slot and takes the next one
+            for user, slot in zip(reversed(stack), reversed(path)):
+                previous = user_match[user]
+                if previous != NO_MATCH:
+                    slot_match[previous] = NO_MATCH
+                slot_match[slot] = user
+                user_match[user] = slot
+            matched += 1
+        return matched
+
+
+class _SlotList(Sequence):
+    """
+    The preferred slot ids of one user, read from the CSR arrays.
+    """
+
+    __slots__ = ("_graph", "_start", "_end")
+
+    def __init__(self, graph, user):
+        self._graph = graph
+        self._start = graph.offsets[user]
+        self._end = graph.offsets[user + 1]
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self._graph.slot_ids[self._graph.targets[self._start + position]]
+
+    def __iter__(self):
+        slot_ids, targets = self._graph.slot_ids, self._graph.targets
+        for i in range(self._start, self._end):
+            yield slot_ids[targets[i]]
+
+
+class UserSlotsView(Mapping):
+    """
+    user_id -> preferred slot ids, like build_matching_graph's user_to_slots.
+    """
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, user_id):
+        return _SlotList(self._graph, _index(self._graph.user_ids, user_id))
+
+    def __iter__(self):
+        return iter(self._graph.user_ids)
+
+    def __len__(self):
+        return len(self._graph.user_ids)
+
+
+class SlotUserView(MutableMapping):
+    """
+    slot_id -> occupant user id or None, like build_matching_graph's slot_to_user.
+    Assignments update both match arrays; slots and users can't be added or removed.
+    """
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, slot_id):
+        user = self._graph.slot_match[_index(self._graph.slot_ids, slot_id)]
+        return None if user == NO_MATCH else self._graph.user_ids[user]
+
+    def __setitem__(self, slot_id, user_id):
+        graph = self._graph
+        slot = _index(graph.slot_ids, slot_id)
+        previous = graph.slot_match[slot]
+        if previous != NO_MATCH and graph.user_match[previous] == slot:
+            graph.user_match[previous] = NO_MATCH
+        if user_id is None:
+            graph.slot_match[slot] = NO_MATCH
+            return
+        user = _index(graph.user_ids, user_id)
+        graph.slot_match[slot] = user
+        graph.user_match[user] = slot
+
+    def __delitem__(self, slot_id):
+        raise TypeError("slots can't be removed from a CSRGraph")
+
+    def __iter__(self):
+        return iter(self._graph.slot_ids)
+
+    def __len__(self):
+        return len(self._graph.slot_ids)
+
+
+def csr_matching(user_to_slots, slot_to_user):
+    """
+    The "csr" matching engine: _kuhn_matching's result, computed on a CSRGraph.
+    Updates slot_to_user in place and returns the number of matches found.
+    """
+    graph = CSRGraph.from_dicts(user_to_slots, slot_to_user)
+    matched = graph.kuhn_matching()
+    for slot_id, occupant in graph._occupants():
+        if slot_to_user.get(slot_id) != occupant:
+            slot_to_user[slot_id] = occupant
+    return matched
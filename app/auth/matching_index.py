@@ -0,0 +1,244 @@
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy.orm import Session
+
+from app.auth.models import PreferredTime, SlotTime, Meeting, User
+from app.auth.promotion import find_promotion_chain
+from app.auth.utils import build_matching_graph
+
+
+class MatchingIndex:
+    """
+    Long-lived, in-process copy of the bipartite matching graph.
+
+      - user_to_slots[user_id] = slot_ids the user *could* use (based on preferences).
+      - slot_to_user[slot_id] = occupant_user_id if booked, or None if free.
+
+    Routes keep it current with O(delta) updates after each commit, so the
+    matching code never has to reload the whole database. `rebuild` loads it
+    from scratch and `reconcile` checks it against `build_matching_graph`.
+
+    Every method takes a threading lock, which `promotion_chains` holds for a
+    whole search; async code calls them through run_in_threadpool, never on
+    the event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.version = 0
+        self._students = set()
+        self._prefs = defaultdict(Counter)       # { user_id: Counter({time_slot: n}) }
+        self._pref_users = defaultdict(set)      # { time_slot: {user_id, ...} }
+        self._slots_at = defaultdict(set)        # { start_time: {slot_id, ...} }
+        self._slot_start = {}                    # { slot_id: start_time }
+        self._user_to_slots = {}                 # { user_id: {slot_id: None} } (ordered set)
+        self._slot_to_user = {}                  # { slot_id: occupant_user_id or None }
+
+    # ------------------------------------------------------------------
+    # Loading / checking against the database
+    # ------------------------------------------------------------------
+
+    def rebuild(self, db: Session):
+        """
+        Reload the whole index from the database.
+        """
+        students = db.query(User.id).filter(User.role == "student").all()
+        prefs = db.query(PreferredTime.user_id, PreferredTime.time_slot).order_by(PreferredTime.id).all()
+        slots = db.query(SlotTime.id, SlotTime.start_time).all()
+        meetings = db.query(Meeting.slot_id, Meeting.student_id).all()
+
+        with self._lock:
+            version = self.version
+            self._reset()
+            self.version = version + 1
+
+            for (student_id,) in students:
+                self._students.add(student_id)
+                self._user_to_slots[student_id] = {}
+
+            for slot_id, start_time in slots:
+                self._slot_start[slot_id] = start_time
+                self._slots_at[start_time].add(slot_id)
+                self._slot_to_user[slot_id] = None
+
+            for user_id, time_slot in prefs:
+                self._add_pref(user_id, time_slot)
+
+            for slot_id, student_id in meetings:
+                self._slot_to_user[slot_id] = student_id
+
+    def reconcile(self, db: Session):
+        """
+        Compare the index with a fresh `build_matching_graph` and rebuild it if they drifted.
+        """
+        db_user_to_slots, db_slot_to_user = build_matching_graph(db)
+        user_to_slots, slot_to_user = self.snapshot()
+
+        in_sync = (
+            slot_to_user == db_slot_to_user
+            and {u: set(s) for u, s in user_to_slots.items()}
+            == {u: set(s) for u, s in db_user_to_slots.items()}
+        )
+        if not in_sync:
+            self.rebuild(db)
+
+        return {"in_sync": in_sync, "rebuilt": not in_sync, "version": self.version}
+
+    def snapshot(self):
+        """
+        Return private copies of (user_to_slots, slot_to_user) that the matching
+        functions are free to mutate.
+        """
+        _, user_to_slots, slot_to_user = self.versioned_snapshot()
+        return user_to_slots, slot_to_user
+
+    def versioned_snapshot(self):
+        """
+        Like `snapshot`, but also return the version the copies were taken at.
+        """
+        with self._lock:
+            user_to_slots = {u: list(slots) for u, slots in self._user_to_slots.items()}
+            slot_to_user = dict(self._slot_to_user)
+            return self.version, user_to_slots, slot_to_user
+
+    def promotion_chains(self, waitlist_heads, blocked=()):
+        """
+        Chains that empty waitlisted slots toward the free slots, one per
+        `find_promotion_chain` search on the live graph (under the lock, with the
+        users who could take a slot straight from the preference index, so nothing
+        is copied): the longest-waiting reachable student first, then again without
+        the slots that chain uses, until nobody else can be placed.
+        Returns [(waitlisted_user_id, moves), ...].
+        """
+        waitlist_heads = dict(waitlist_heads)
+        blocked = set(blocked)
+        promotions = []
+        with self._lock:
+            while waitlist_heads:
+                free_slot_ids = [
+                    slot_id for slot_id, occupant in self._slot_to_user.items() if occupant is None
+                ]
+                promotion = find_promotion_chain(
+                    free_slot_ids, waitlist_heads, self._users_for_slot, self._slot_to_user, blocked
+                )
+                if promotion is None:
+                    break
+                promotions.append(promotion)
+                _, moves = promotion
+                del waitlist_heads[moves[0][1]]
+                for _, current_slot_id, new_slot_id in moves:
+                    blocked.update((current_slot_id, new_slot_id))
+        return promotions
+
+    # ------------------------------------------------------------------
+    # Incremental updates (call after the matching DB commit)
+    # ------------------------------------------------------------------
+
+    def add_student(self, user_id):
+        with self._lock:
+            self._students.add(user_id)
+            self._user_to_slots.setdefault(user_id, {})
+            self.version += 1
+
+    def remove_student(self, user_id):
+        with self._lock:
+            self._students.discard(user_id)
+            # Users with preferences stay in the graph, like build_matching_graph does
+            if not self._prefs.get(user_id):
+                self._user_to_slots.pop(user_id, None)
+            self.version += 1
+
+    def add_preference(self, user_id, time_slot):
+        with self._lock:
+            self._add_pref(user_id, time_slot)
+            self.version += 1
+
+    def remove_preference(self, user_id, time_slot):
+        with self._lock:
+            prefs = self._prefs.get(user_id)
+            if not prefs or not prefs[time_slot]:
+                return
+            prefs[time_slot] -= 1
+            if not prefs[time_slot]:
+                del prefs[time_slot]
+                self._pref_users[time_slot].discard(user_id)
+                slots = self._user_to_slots.get(user_id, {})
+                for slot_id in self._resolve(time_slot):
+                    slots.pop(slot_id, None)
+            if not prefs and user_id not in self._students:
+                self._user_to_slots.pop(user_id, None)
+            self.version += 1
+
+    def add_slot(self, slot_id, start_time, occupant=None):
+        with self._lock:
+            self._add_slot(slot_id, start_time, occupant)
+            self.version += 1
+
+    def add_slots(self, slots):
+        """
+        Add many new free slots, given as (slot_id, start_time) pairs, as one update.
+        """
+        with self._lock:
+            for slot_id, start_time in slots:
+                self._add_slot(slot_id, start_time, None)
+            self.version += 1
+
+    def book(self, slot_id, user_id):
+        with self._lock:
+            self._slot_to_user[slot_id] = user_id
+            self.version += 1
+
+    def release(self, slot_id):
+        with self._lock:
+            if slot_id in self._slot_to_user:
+                self._slot_to_user[slot_id] = None
+            self.version += 1
+
+    def sync_slots(self, db: Session, slot_ids):
+        """
+        Refresh the occupant of the given slots from the meetings table.
+        """
+        slot_ids = set(slot_ids)
+        if not slot_ids:
+            return
+        occupants = dict(
+            db.query(Meeting.slot_id, Meeting.student_id).filter(Meeting.slot_id.in_(slot_ids)).all()
+        )
+        with self._lock:
+            for slot_id in slot_ids:
+                if slot_id in self._slot_to_user:
+                    self._slot_to_user[slot_id] = occupants.get(slot_id)
+            self.version += 1
+
+    # ------------------------------------------------------------------
+    # Helpers (lock must be held)
+    # ------------------------------------------------------------------
+
+    def _add_slot(self, slot_id, start_time, occupant):
+        self._slot_start[slot_id] = start_time
+        self._slots_at[start_time].add(slot_id)
+        self._slot_to_user[slot_id] = occupant
+
+        # Everyone who prefers this start time can now use the new slot
+        for user_id in self._pref_users.get(start_time, ()):
+            self._user_to_slots.setdefault(user_id, {})[slot_id] = None
+
+    def _users_for_slot(self, slot_id):
+        return self._pref_users.get(self._slot_start.get(slot_id), ())
+
+    def _resolve(self, time_slot):
+        return sorted(self._slots_at.get(time_slot, ()))
+
+    def _add_pref(self, user_id, time_slot):
+        self._prefs[user_id][time_slot] += 1
+        self._pref_users[time_slot].add(user_id)
+        slots = self._user_to_slots.setdefault(user_id, {})
+        for slot_id in self._resolve(time_slot):
+            slots[slot_id] = None
+
+
+matching_index = MatchingIndex()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Enum,Time
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Enum,Time, Index, text
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime,time
 
@@ -29,13 +29,18 @@ class SlotTime(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     professor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    start_time = Column(DateTime, nullable=False)
+    start_time = Column(DateTime, nullable=False, index=True)
     end_time = Column(DateTime, nullable=False)
     is_booked = Column(Boolean, default=False)
 
     professor = relationship("User", back_populates="slots", foreign_keys=[professor_id])
     waiting_users = relationship("WaitList", back_populates="slot")
 
+    __table_args__ = (
+        # One professor's slots on a day: equality on professor_id, range on start_time
+        Index("ix_slot_times_professor_id_start_time", "professor_id", "start_time"),
+    )
+
 
 class Meeting(Base):
     __tablename__ = "meetings"
@@ -50,6 +55,11 @@ class Meeting(Base):
     student = relationship("User", back_populates="meetings_as_student", foreign_keys=[student_id])
     professor = relationship("User", back_populates="meetings_as_professor", foreign_keys=[professor_id])
 
+    __table_args__ = (
+        # One meeting per slot: the database refuses a double booking
+        Index("uq_meetings_slot_id", "slot_id", unique=True),
+    )
+
 class WaitList(Base):
     __tablename__ = "waitlist"
 
@@ -76,21 +86,62 @@ class RescheduleRequest(Base):
     __tablename__ = "reschedule_requests"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_ids = Column(String, nullable=False)  # Store multiple user IDs as a comma-separated string
-    current_slot_ids = Column(String, nullable=False)  # Store current slots as a comma-separated string
-    new_slot_ids = Column(String, nullable=False)  # Store new slots as a comma-separated string
-    professor_ids = Column(String, nullable=False)  # Store professor IDs as a comma-separated string
-    status = Column(String, default="Pending")
+    # Legacy comma-separated columns, superseded by reschedule_moves / reschedule_approvals.
+    # Kept (defaulting to "") because existing databases declare them NOT NULL.
+    user_ids = Column(String, nullable=False, default="")
+    current_slot_ids = Column(String, nullable=False, default="")
+    new_slot_ids = Column(String, nullable=False, default="")
+    professor_ids = Column(String, nullable=False, default="")
+    status = Column(String, default="Pending", index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    approved_user_ids = Column(String, nullable=False)  # Store approved user IDs as a comma-separated string
+    approved_user_ids = Column(String, nullable=False, default="")
+    # Optimistic lock: bumped by every change (see app.auth.reschedule.advance)
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
 
     notifications = relationship("Notification", back_populates="reschedule_request", cascade="all, delete")
+    moves = relationship(
+        "RescheduleMove", back_populates="request", order_by="RescheduleMove.position",
+        cascade="all, delete-orphan",
+    )
+    approvals = relationship("RescheduleApproval", back_populates="request", cascade="all, delete-orphan")
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+
+class RescheduleMove(Base):
+    """
+    One occupant's move in a reschedule chain. Position 0 holds the slot being
+    handed over; each move's new slot is the next move's current slot, and the
+    last move goes to a free slot.
+    """
+    __tablename__ = "reschedule_moves"
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, ForeignKey("reschedule_requests.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    current_slot_id = Column(Integer, ForeignKey("slot_times.id"), nullable=False)
+    new_slot_id = Column(Integer, ForeignKey("slot_times.id"), nullable=False)
+    professor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    request = relationship("RescheduleRequest", back_populates="moves")
+
+    __table_args__ = (
+        Index("uq_reschedule_moves_request_id_position", "request_id", "position", unique=True),
+    )
 
 
-    # user = relationship("User", foreign_keys=[user_ids])
-    # professor = relationship("User", foreign_keys=[professor_ids])
-    # current_slot = relationship("SlotTime", foreign_keys=[current_slot_ids])
-    # new_slot = relationship("SlotTime", foreign_keys=[new_slot_ids])
+class RescheduleApproval(Base):
+    """
+    An occupant's acceptance of a reschedule request (one row per user).
+    """
+    __tablename__ = "reschedule_approvals"
+
+    request_id = Column(Integer, ForeignKey("reschedule_requests.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    approved_at = Column(DateTime, default=datetime.utcnow)
+
+    request = relationship("RescheduleRequest", back_populates="approvals")
 
 
 
@@ -106,3 +157,21 @@ class Notification(Base):
 
     user = relationship("User", back_populates="notifications")
     reschedule_request = relationship("RescheduleRequest", back_populates="notifications")
+
+    __table_args__ = (
+        # A user's notifications filtered by read state, newest first
+        Index("ix_notifications_user_id_is_read_created_at", "user_id", "is_read", "created_at"),
+        # A user's whole history in cursor order (created_at, id), for the paginated listing
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+
+class NotificationCounter(Base):
+    """
+    Per-user unread notification count, kept in step with Notification.is_read.
+    Created lazily the first time a user's count is asked for.
+    """
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
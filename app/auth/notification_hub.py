@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+def notification_payload(notification):
+    """
+    JSON-friendly dict of a Notification (ORM object or row), as /notifications returns it.
+    """
+    return {
+        "id": notification.id,
+        "message": notification.message,
+        "is_read": bool(notification.is_read),
+        "created_at": notification.created_at.isoformat(),
+        "reschedule_id": notification.reschedule_id,
+    }
+
+
+class Subscription:
+    """
+    One listener's queue of events for one user. Consume with `await get()`,
+    call `close()` when done.
+    """
+
+    def __init__(self, hub, user_id, loop):
+        self.hub = hub
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.hub._unsubscribe(self)
+
+
+class NotificationHub:
+    """
+    Per-user fan-out of notification changes to the open dashboards of this process.
+
+    Publishers call `publish(user_id, event)` after the change is committed; every
+    subscription of that user receives the event on its own event loop. Events:
+
+      - {"type": "created", "notification": {...}, "unread_count": n}
+      - {"type": "read", "ids": [notification_id, ...], "unread_count": n}
+      - {"type": "deleted", "ids": [notification_id, ...], "unread_count": n}
+
+    unread_count is the user's new unread count, or None when it is unknown
+    (counter not initialised yet, or unchanged by the event).
+
+    In-process state; see "Deployment notes" in the README.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)     # { user_id: {Subscription, ...} }
+
+    def subscribe(self, user_id):
+        """
+        Start listening for `user_id`. Must be called from a running event loop.
+        """
+        subscription = Subscription(self, user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        """
+        Deliver an event to every subscription of `user_id`. Safe to call from any thread.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's loop is closed (server shutting down)
+                subscription.close()
+        logger.debug("Published %s to %d subscriber(s) of User %s", event["type"], len(subscribers), user_id)
+
+    def publish_all(self, events):
+        """
+        Publish a list of (user_id, event) pairs, e.g. from utils.read_events / delete_notifications.
+        """
+        for user_id, event in events:
+            self.publish(user_id, event)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+notification_hub = NotificationHub()
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# bcrypt cost; hashes made with another cost are re-hashed on the user's next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Processes doing the hashing (each keeps one core busy while it works)
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Hash/verify jobs admitted at once (running + queued); more are refused with 503
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(PASSWORD_WORKERS * 16)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+# These run inside the worker processes
+def _hash(password):
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password, hashed):
+    return pwd_context.verify_and_update(password, hashed)
+
+
+def _ready():
+    return None
+
+
+class PasswordPool:
+    """
+    bcrypt off the event loop and off the request threadpool: jobs run in a
+    small process pool, so a login storm uses at most PASSWORD_WORKERS cores
+    and every other endpoint keeps its threads.
+
+    Admission control: at most `max_pending` jobs are running or queued;
+    beyond that callers get a 503 with Retry-After right away instead of
+    piling up behind the pool. Call from the event loop only.
+    """
+
+    def __init__(self, workers=PASSWORD_WORKERS, max_pending=PASSWORD_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a server process that runs threads and an event loop isn't safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def start(self):
+        """
+        Spawn the workers ahead of the first login (importing passlib/bcrypt takes a moment).
+        """
+        pool = self._pool()
+        for _ in range(self.workers):
+            pool.submit(_ready)
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Password pool full (%d pending), refusing a request", self.pending)
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password):
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password, hashed):
+        """
+        (valid, new_hash): new_hash is set when the stored hash uses outdated parameters.
+        """
+        return await self._run(_verify_and_update, password, hashed)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queue_depth": max(0, self.pending - self.workers),
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool()
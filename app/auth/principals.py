@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import jwt
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = os.getenv("ALGORITHM")
+# How many decoded tokens are kept (least recently used are dropped first)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+
+class Principal:
+    """
+    The authenticated user as the token's claims describe it. Routes only need
+    `id` and `role` for authorization, so no `users` row is loaded.
+    """
+
+    __slots__ = ("id", "role", "expires_at")
+
+    def __init__(self, user_id, role, expires_at):
+        self.id = user_id
+        self.role = role
+        self.expires_at = expires_at
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of decoded tokens, keyed by the token's SHA-256. An entry lives
+    until the token's `exp`, so a request with a known token skips the JWT
+    decode entirely.
+
+    `set_role` is the explicit invalidation for role changes (promote_to_professor):
+    tokens issued before the change still carry the old role claim, so the new
+    role overrides it from then on.
+
+    In-process state; see "Deployment notes" in the README. Admin-only routes
+    check the role in `users` (routes.get_verified_user) instead.
+    """
+
+    def __init__(self, maxsize=AUTH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()           # { token_key: Principal }
+        self._keys_by_user = defaultdict(set)   # { user_id: {token_key, ...} }
+        self._roles = {}                        # { user_id: role set after the token was issued }
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        key = _token_key(token)
+        with self._lock:
+            principal = self._entries.get(key)
+            if principal is None or principal.expires_at <= time.time():
+                if principal is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, token, principal):
+        """
+        Cache a freshly decoded principal and return it (with any role override applied).
+        """
+        key = _token_key(token)
+        with self._lock:
+            principal.role = self._roles.get(principal.id, principal.role)
+            self._entries[key] = principal
+            self._entries.move_to_end(key)
+            self._keys_by_user[principal.id].add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+        return principal
+
+    def set_role(self, user_id, role):
+        """
+        Record a role change: drop the user's cached tokens and override their role claim.
+        Only this process sees it.
+        """
+        with self._lock:
+            self._roles[user_id] = role
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._roles.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def _drop(self, key):
+        principal = self._entries.pop(key)
+        keys = self._keys_by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[principal.id]
+
+
+principal_cache = PrincipalCache()
+
+
+def decode_principal(token: str) -> Principal:
+    """
+    The principal of a bearer token: from the cache, or decoded (and cached) once.
+    Raises 401 for expired or invalid tokens.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        logger.debug("Token has expired")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired")
+    except jwt.PyJWTError as e:
+        logger.debug("JWT error: %s", e)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    user_id = payload.get("sub")
+    if not user_id or not str(user_id).isdigit() or not payload.get("exp"):
+        logger.debug("Token payload has no usable sub/exp")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return principal_cache.put(token, Principal(int(user_id), payload.get("role"), payload["exp"]))
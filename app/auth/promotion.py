@@ -0,0 +1,74 @@
+from collections import deque
+
+
+def find_promotion_chain(free_slot_ids, waitlist_heads, users_for_slot, slot_to_user, blocked=()):
+    """
+    Fill a free slot from the waitlist with one backward search.
+
+      - free_slot_ids: the free slots a chain may end in (e.g. the one just freed).
+      - waitlist_heads[slot_id] = (rank, user_id): the first student waiting for
+        that slot and their place in the global FIFO order (0 = waiting longest).
+      - users_for_slot(slot_id) = the users who could take that slot.
+      - slot_to_user[slot_id] = occupant_user_id or None.
+      - blocked: slots the chain must not use (e.g. those of pending requests).
+
+    Starting at the free slots, the search goes to the occupants who could move
+    into them, then to the slots they would vacate, and so on. Every slot reached
+    this way can be emptied by shifting its occupant (and the ones after) along
+    toward a free slot, so each reached slot with a waitlist is a candidate,
+    and the one whose head has waited longest wins.
+
+    Returns (waitlisted_user_id, moves) with moves as (user_id, current_slot_id,
+    new_slot_id) in chain order: the first vacates the slot the waitlisted user
+    gets, the last ends in a free slot. Returns None if no waitlisted slot
+    can be emptied.
+    """
+    slots_of = {}
+    for slot_id, occupant in slot_to_user.items():
+        if occupant is not None:
+            slots_of.setdefault(occupant, []).append(slot_id)
+
+    def chain(slot_id):
+        moves = []
+        while moves_into[slot_id] is not None:
+            target = moves_into[slot_id]
+            moves.append((slot_to_user[slot_id], slot_id, target))
+            slot_id = target
+        return moves
+
+    def acceptable(waitlisted_user_id, moves):
+        # The waitlisted student can't be one of the occupants asked to move
+        return all(user_id != waitlisted_user_id for user_id, _, _ in moves)
+
+    # { slot_id: slot its occupant moves into }, None for the free slots, False for blocked ones
+    moves_into = dict.fromkeys(blocked, False)
+    sources = [slot_id for slot_id in free_slot_ids if slot_id not in moves_into]
+    moves_into.update(dict.fromkeys(sources))
+    candidates = []                         # [(rank, slot_id), ...]
+    queue = deque(sources)
+    while queue:
+        target = queue.popleft()
+        for user_id in users_for_slot(target):
+            for slot_id in slots_of.get(user_id, ()):
+                if slot_id in moves_into:
+                    continue
+                moves_into[slot_id] = target
+                queue.append(slot_id)
+
+                head = waitlist_heads.get(slot_id)
+                if head is None:
+                    continue
+                rank, waitlisted_user_id = head
+                if rank == 0:
+                    # Nobody has waited longer: no need to search any further
+                    moves = chain(slot_id)
+                    if acceptable(waitlisted_user_id, moves):
+                        return waitlisted_user_id, moves
+                candidates.append((rank, slot_id))
+
+    for rank, slot_id in sorted(candidates):
+        waitlisted_user_id = waitlist_heads[slot_id][1]
+        moves = chain(slot_id)
+        if acceptable(waitlisted_user_id, moves):
+            return waitlisted_user_id, moves
+    return None
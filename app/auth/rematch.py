@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.matching_index import matching_index
+from app.auth.models import Meeting, RescheduleMove, RescheduleRequest, WaitList
+from app.auth.reschedule import new_reschedule_request
+from app.auth.utils import send_notification
+from app.db import SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# A batch of matching events closes once none arrived for this long...
+REMATCH_DEBOUNCE_MS = float(os.getenv("REMATCH_DEBOUNCE_MS", "250"))
+# ...or this long after its first event, even if events keep coming
+REMATCH_MAX_DELAY_MS = float(os.getenv("REMATCH_MAX_DELAY_MS", "2000"))
+
+
+def run_rematch_pass(db: Session):
+    """
+    One matching pass: propose a reschedule chain for every waitlisted slot that
+    can be emptied toward a free slot, longest-waiting student first. Slots that
+    are part of a pending request are left alone, so proposals never overlap.
+    Returns the ids of the reschedule requests created.
+    """
+    waitlist_heads = {}     # { slot_id: (FIFO rank, user_id) of its first waitlisted student }
+    waitlist = db.execute(
+        select(WaitList.slot_id, WaitList.user_id).order_by(WaitList.created_at.asc(), WaitList.id.asc())
+    )
+    for rank, (slot_id, user_id) in enumerate(waitlist):
+        waitlist_heads.setdefault(slot_id, (rank, user_id))
+    if not waitlist_heads:
+        return []
+
+    blocked = set()
+    pending_moves = db.execute(
+        select(RescheduleMove.current_slot_id, RescheduleMove.new_slot_id)
+        .join(RescheduleRequest, RescheduleRequest.id == RescheduleMove.request_id)
+        .where(RescheduleRequest.status == "Pending")
+    )
+    for current_slot_id, new_slot_id in pending_moves:
+        blocked.update((current_slot_id, new_slot_id))
+
+    promotions = matching_index.promotion_chains(waitlist_heads, blocked)
+    if not promotions:
+        return []
+
+    # The index found the chains; the meetings table confirms them and names the professors
+    occupants = {
+        slot_id: (student_id, professor_id)
+        for slot_id, student_id, professor_id in db.execute(
+            select(Meeting.slot_id, Meeting.student_id, Meeting.professor_id).where(Meeting.slot_id.in_([
+                current_slot_id for _, chain in promotions for _, current_slot_id, _ in chain
+            ]))
+        )
+    }
+    created = []
+    for waitlisted_user_id, chain in promotions:
+        if any(occupants.get(current_slot_id, (None,))[0] != user_id for user_id, current_slot_id, _ in chain):
+            logger.warning("Matching index disagrees with the meetings of chain %s; not proposing it", chain)
+            continue
+        moves = [
+            (user_id, current_slot_id, new_slot_id, occupants[current_slot_id][1])
+            for user_id, current_slot_id, new_slot_id in chain
+        ]
+        logger.debug("Promotion chain for waitlisted User %s: %s", waitlisted_user_id, moves)
+
+        res_req = new_reschedule_request(moves)
+        db.add(res_req)
+        db.commit()
+        for occupant_id, _, new_slot_id, _ in moves:
+            send_notification(
+                occupant_id,
+                f"You have a request to move to slot {new_slot_id} (Request ID: {res_req.id}).",
+                db,
+                reschedule_id=res_req.id
+            )
+        created.append(res_req.id)
+    return created
+
+
+class RematchWorker:
+    """
+    Owns matching for cancellations and waitlist joins. Routes `enqueue` an event
+    and return right away; the worker collects events until none arrived for
+    REMATCH_DEBOUNCE_MS (or REMATCH_MAX_DELAY_MS after the first), then runs one
+    `run_rematch_pass` for the whole batch in the threadpool. A burst of 50
+    cancellations costs one or two passes instead of 50.
+
+    In-process state; see "Deployment notes" in the README.
+    """
+
+    def __init__(self, debounce_ms=REMATCH_DEBOUNCE_MS, max_delay_ms=REMATCH_MAX_DELAY_MS):
+        self.debounce = debounce_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.passes = 0
+        self.failures = 0
+        self.proposals = 0
+        self.last_batch_size = 0
+        self.last_pass_ms = None
+        self.max_pass_ms = 0.0
+        self.total_pass_ms = 0.0
+
+    def start(self):
+        """
+        Start the worker on the running event loop (from an async startup hook).
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._loop = self._queue = self._task = None
+
+    def enqueue(self, kind, slot_id):
+        """
+        Report a change matching should look at ("slot_freed", "waitlist_joined";
+        "request_rejected", "request_stale" and "startup" pass slot_id None).
+        Safe to call from any thread.
+        """
+        if self._loop is None:
+            self.dropped += 1
+            logger.warning("Rematch worker is not running; dropping %s event for slot %s", kind, slot_id)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._put, (kind, slot_id))
+        except RuntimeError:
+            # The worker's loop is closed (server shutting down)
+            self.dropped += 1
+
+    def _put(self, event):
+        self.received += 1
+        self._queue.put_nowait(event)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_delay
+            while True:
+                timeout = min(self.debounce, deadline - self._loop.time())
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._process(batch)
+
+    async def _process(self, batch):
+        started = time.perf_counter()
+        try:
+            created = await run_in_threadpool(self._pass)
+        except Exception:
+            self.failures += 1
+            logger.exception("Rematch pass over %d event(s) failed", len(batch))
+            created = []
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.processed += len(batch)
+        self.passes += 1
+        self.proposals += len(created)
+        self.last_batch_size = len(batch)
+        self.last_pass_ms = elapsed_ms
+        self.max_pass_ms = max(self.max_pass_ms, elapsed_ms)
+        self.total_pass_ms += elapsed_ms
+        logger.info(
+            "Rematch pass over %d event(s) proposed %d reschedule request(s) in %.1f ms",
+            len(batch), len(created), elapsed_ms,
+        )
+
+    def _pass(self):
+        db = SessionLocal()
+        try:
+            return run_rematch_pass(db)
+        finally:
+            db.close()
+
+    def stats(self):
+        return {
+            "running": self._task is not None,
+            "queue_depth": self.received - self.processed,
+            "events": self.received,
+            "passes": self.passes,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "proposals": self.proposals,
+            "last_batch_size": self.last_batch_size,
+            "last_pass_ms": None if self.last_pass_ms is None else round(self.last_pass_ms, 2),
+            "avg_pass_ms": round(self.total_pass_ms / self.passes, 2) if self.passes else None,
+            "max_pass_ms": round(self.max_pass_ms, 2),
+            "debounce_ms": self.debounce * 1000,
+            "max_delay_ms": self.max_delay * 1000,
+        }
+
+
+rematch_worker = RematchWorker()
@@ -0,0 +1,72 @@
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth.models import RescheduleApproval, RescheduleMove, RescheduleRequest
+
+logger = logging.getLogger(__name__)
+
+# The statuses a request may move to from each status. An approval keeps it
+# Pending; Finalized, Rejected and Stale are final.
+RESCHEDULE_TRANSITIONS = {
+    "Pending": ("Pending", "Finalized", "Rejected", "Stale"),
+}
+
+
+def advance(res_req: RescheduleRequest, status):
+    """
+    Move a request to `status` and bump its version. The version is the mapper's
+    version_id_col, so the flush raises StaleDataError if another transaction
+    changed the request since it was loaded.
+    """
+    if status not in RESCHEDULE_TRANSITIONS.get(res_req.status, ()):
+        raise HTTPException(
+            status_code=409, detail=f"Reschedule request is {res_req.status}, it can't become {status}."
+        )
+    res_req.status = status
+    res_req.version += 1
+
+
+def new_reschedule_request(moves):
+    return RescheduleRequest(
+        status="Pending",
+        moves=[
+            RescheduleMove(
+                position=position, user_id=user_id, current_slot_id=current_slot_id,
+                new_slot_id=new_slot_id, professor_id=professor_id,
+            )
+            for position, (user_id, current_slot_id, new_slot_id, professor_id) in enumerate(moves)
+        ],
+    )
+
+
+def backfill_legacy_requests(db: Session):
+    """
+    Give requests created before reschedule_moves existed their moves and approvals,
+    parsed once from the legacy comma-separated columns.
+    """
+    requests = db.query(RescheduleRequest)\
+        .filter(~RescheduleRequest.moves.any(), RescheduleRequest.user_ids != "").all()
+    for res_req in requests:
+        try:
+            user_ids, current_slot_ids, new_slot_ids, professor_ids = (
+                [int(value) for value in column.split(",") if value.strip()]
+                for column in (res_req.user_ids, res_req.current_slot_ids,
+                               res_req.new_slot_ids, res_req.professor_ids)
+            )
+        except ValueError:
+            logger.warning("Reschedule request %s has unreadable legacy data, skipping it", res_req.id)
+            continue
+        for position, move in enumerate(zip(user_ids, current_slot_ids, new_slot_ids, professor_ids)):
+            user_id, current_slot_id, new_slot_id, professor_id = move
+            res_req.moves.append(RescheduleMove(
+                position=position, user_id=user_id, current_slot_id=current_slot_id,
+                new_slot_id=new_slot_id, professor_id=professor_id,
+            ))
+        approved = {int(value) for value in (res_req.approved_user_ids or "").split(",") if value.strip()}
+        for user_id in approved & set(user_ids):
+            res_req.approvals.append(RescheduleApproval(user_id=user_id))
+    if requests:
+        db.commit()
+        logger.info("Backfilled moves of %d legacy reschedule request(s)", len(requests))
@@ -1,24 +1,50 @@
+import logging
 import os
 from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException, Depends, Request
-from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, EmailStr, Field
+from sqlalchemy import bindparam, case, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import jwt
-from datetime import datetime, timedelta
-from app.db import SessionLocal
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from app.db import SessionLocal, AsyncSessionLocal
 from app.auth.models import User, SlotTime, Meeting,WaitList,PreferredTime,Notification,RescheduleRequest
-from app.auth.utils import hash_password, verify_password, verify_token,build_matching_graph,send_notification,max_bipartite_matching,get_user_assignments,visualize_matching_graph,try_single_user_bfs_in_memory
+from app.auth.models import RescheduleApproval
+from app.auth.utils import verify_token,send_notification
+from app.auth.utils import delete_notifications, get_unread_count, mark_read_update, read_events, unread_counter_update
+from app.auth.matching_index import matching_index
+from app.auth.passwords import password_pool
+from app.auth.reschedule import advance
+from app.auth.principals import Principal, decode_principal, principal_cache
+from app.auth.rematch import rematch_worker
+from app.auth.slot_recurrence import SlotIntervalIndex, expand_weekly
+from app.auth.notification_hub import notification_hub, notification_payload
+from app.auth.visualization import matching_graph_png
+from app.instrumentation import query_stats
 
 # Load environment variables from the .env file
 load_dotenv()
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Load sensitive configurations from .env
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# Upper bounds for one recurring-slots request
+MAX_RECURRENCE_DAYS = int(os.getenv("MAX_RECURRENCE_DAYS", "366"))
+MAX_BULK_SLOTS = int(os.getenv("MAX_BULK_SLOTS", "5000"))
+# Attempts of an accept/reject that lost an optimistic-lock race with another participant
+RESCHEDULE_RETRIES = int(os.getenv("RESCHEDULE_RETRIES", "3"))
+
 
 # Dependency to get database session
 def get_db():
@@ -28,6 +54,12 @@ def get_db():
     finally:
         db.close()
 
+
+# Async variant for the hot routes, so DB I/O doesn't hold a threadpool slot
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Define the request models
 class SignupRequest(BaseModel):
     name: str
@@ -47,6 +79,15 @@ class SlotRequest(BaseModel):
     start: datetime
     end: datetime
 
+class RecurringSlotsRequest(BaseModel):
+    weekdays: list[int]                 # 0 = Monday ... 6 = Sunday
+    start_date: date
+    until: date                         # inclusive
+    day_start: time
+    day_end: time
+    slot_minutes: int = Field(15, ge=5, le=480)
+    skip_conflicts: bool = False        # skip overlapping slots instead of rejecting the request
+
 class BookSlotRequest(BaseModel):
     slot_id: int
     meeting_purpose:str
@@ -60,6 +101,10 @@ class WaitListRequest(BaseModel):
 
 class PreferenceRequest(BaseModel):
     time_slots: list[str]
+
+class MarkReadRequest(BaseModel):
+    ids: list[int] = []
+    all: bool = False
     
 def create_access_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
@@ -68,47 +113,69 @@ def create_access_token(data: dict, expires_delta: timedelta):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_logged_in_user(request: Request, db: Session = Depends(get_db)):
+def _naive(value: datetime):
+    """
+    Slot times are stored as naive wall-clock datetimes; drop any UTC offset the client sent.
+    """
+    return value.replace(tzinfo=None)
+
+def get_principal(request: Request) -> Principal:
     token = request.headers.get("Authorization")
-    print(f"Authorization header received: {token}")
     if not token:
-        print("Authorization header is missing")
+        logger.debug("Authorization header is missing")
         raise HTTPException(status_code=401, detail="Authorization token missing")
     
     if not token.startswith("Bearer "):
-        print("Token does not start with 'Bearer'")
+        logger.debug("Token does not start with 'Bearer'")
         raise HTTPException(status_code=401, detail="Invalid token format")
 
-    token = token.replace("Bearer ", "")
-    print(f"Token after removing 'Bearer': {token}")
+    return decode_principal(token[len("Bearer "):])
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"Decoded payload: {payload}")
-        user_id = payload.get("sub")
-        if not user_id:
-            print("User ID not found in token payload")
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            print(f"No user found for ID: {user_id}")
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
-    except jwt.ExpiredSignatureError:
-        print("Token has expired")
-        raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.PyJWTError as e:
-        print(f"JWT error: {e}")
-        raise HTTPException(status_code=401, detail="Invalid token")
+def get_logged_in_user(request: Request, db: Session = Depends(get_db)):
+    """
+    The caller's id and role, straight from the (cached) token claims. Only tokens
+    without a role claim fall back to loading the user.
+    """
+    principal = get_principal(request)
+    if principal.role is not None:
+        return principal
+    user = db.query(User).filter(User.id == principal.id).first()
+    if not user:
+        logger.debug("No user found for ID: %s", principal.id)
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+def get_verified_user(request: Request, db: Session):
+    """
+    The caller's current `users` row, for admin-only routes: unlike the token's
+    role claim (and this process's role overrides) it reflects promotions made
+    by other workers, and a deleted user's token stops working.
+    """
+    principal = get_principal(request)
+    user = db.query(User).filter(User.id == principal.id).first()
+    if not user:
+        logger.debug("No user found for ID: %s", principal.id)
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+async def get_logged_in_user_async(request: Request, db: AsyncSession):
+    principal = get_principal(request)
+    if principal.role is not None:
+        return principal
+    user = (await db.execute(select(User).where(User.id == principal.id))).scalar_one_or_none()
+    if not user:
+        logger.debug("No user found for ID: %s", principal.id)
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 @router.post("/signup")
-def signup(data: SignupRequest, db: Session = Depends(get_db)):
+async def signup(data: SignupRequest, db: AsyncSession = Depends(get_async_db)):
     # Check if the email already exists
-    existing_user = db.query(User).filter(User.email == data.email).first()
+    existing_user = (await db.execute(select(User.id).where(User.email == data.email))).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = hash_password(data.password)
+    hashed_password = await password_pool.hash(data.password)
     # Create a new user
     new_user = User(
         name=data.name,
@@ -117,24 +184,32 @@ def signup(data: SignupRequest, db: Session = Depends(get_db)):
         role=data.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    if new_user.role == "student":
+        # Off the event loop: a rematch pass holds the index lock for its whole search
+        await run_in_threadpool(matching_index.add_student, new_user.id)
     return {"message": "User created successfully", "user_id": new_user.id}
 
 @router.post("/login")
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.password):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == data.email))).scalar_one_or_none()
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    valid, new_hash = await password_pool.verify_and_update(data.password, user.password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Hashed with outdated bcrypt settings: store the re-hash while we have the password
+        user.password = new_hash
+        await db.commit()
 
+    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id), "role": user.role},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    decoded_token = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
-
-    print("Decoded token:", decoded_token)
-
+    # We know the claims already: cache them instead of decoding the token on its first use
+    principal_cache.put(access_token, Principal(user.id, user.role, expire.replace(tzinfo=timezone.utc).timestamp()))
 
     return {
         "access_token": access_token,
@@ -159,15 +234,120 @@ def create_slot(data: SlotRequest, request: Request, db: Session = Depends(get_d
     db.add(new_slot)
     db.commit()
     db.refresh(new_slot)
+    matching_index.add_slot(new_slot.id, new_slot.start_time)
     return {"message": "Slot created successfully", "slot_id": new_slot.id}
 
+@router.post("/create_slots/recurring")
+def create_recurring_slots(data: RecurringSlotsRequest, request: Request, db: Session = Depends(get_db)):
+    """
+    Create a professor's weekly office hours in one go: the rule is expanded
+    server-side, checked against the professor's existing slots and inserted
+    in a single transaction.
+    """
+    user = get_logged_in_user(request, db)
+    if user.role != "professor":
+        raise HTTPException(status_code=403, detail="Only professors can create slots")
+
+    if not data.weekdays or any(day not in range(7) for day in data.weekdays):
+        raise HTTPException(status_code=400, detail="weekdays must be 0 (Monday) to 6 (Sunday)")
+    if data.until < data.start_date:
+        raise HTTPException(status_code=400, detail="until must not be before start_date")
+    if (data.until - data.start_date).days >= MAX_RECURRENCE_DAYS:
+        raise HTTPException(status_code=400, detail=f"A rule can span at most {MAX_RECURRENCE_DAYS} days")
+    day_start, day_end = data.day_start.replace(tzinfo=None), data.day_end.replace(tzinfo=None)
+    if day_end <= day_start:
+        raise HTTPException(status_code=400, detail="day_end must be after day_start")
+
+    slots = expand_weekly(data.weekdays, data.start_date, data.until, day_start, day_end, data.slot_minutes)
+    if not slots:
+        raise HTTPException(status_code=400, detail="The rule does not produce any slot")
+    if len(slots) > MAX_BULK_SLOTS:
+        raise HTTPException(status_code=400, detail=f"The rule produces {len(slots)} slots (max {MAX_BULK_SLOTS})")
+
+    # Existing slots of this professor that could touch the rule's time span
+    existing = SlotIntervalIndex(
+        db.query(SlotTime.start_time, SlotTime.end_time)
+        .filter(
+            SlotTime.professor_id == user.id,
+            SlotTime.start_time < slots[-1][1],
+            SlotTime.end_time > slots[0][0],
+        )
+        .all()
+    )
+    new_slots = [slot for slot in slots if not existing.overlaps(*slot)]
+    conflicts = len(slots) - len(new_slots)
+    if conflicts and not data.skip_conflicts:
+        first_conflict = next(start for start, end in slots if existing.overlaps(start, end))
+        raise HTTPException(
+            status_code=409,
+            detail=f"{conflicts} of {len(slots)} slots overlap existing slots (first at {first_conflict.isoformat()})",
+        )
+
+    created = []
+    if new_slots:
+        created = db.execute(
+            insert(SlotTime).returning(SlotTime.id, SlotTime.start_time, sort_by_parameter_order=True),
+            [
+                {"professor_id": user.id, "start_time": start, "end_time": end, "is_booked": False}
+                for start, end in new_slots
+            ],
+        ).all()
+        db.commit()
+        matching_index.add_slots(created)
+
+    return {
+        "message": f"{len(created)} slots created",
+        "created": len(created),
+        "skipped": conflicts,
+        "slot_ids": [slot_id for slot_id, _ in created],
+    }
+
 @router.get("/get_slots",dependencies=[Depends(verify_token)])
-def get_slots(request:Request ,db: Session = Depends(get_db)):
-    user = get_logged_in_user(request,db)
+async def get_slots(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    aggregate: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Slots starting in [start, end) (both optional; everything when omitted).
+    aggregate=day returns per-day counts instead: [{"date", "available", "booked"}].
+    """
+    user = await get_logged_in_user_async(request, db)
     if user.role not in ["student", "professor"]:
         raise HTTPException(status_code=403, detail="Access denied")
-    slots = db.query(SlotTime).all()
-    return [
+    if aggregate not in (None, "day"):
+        raise HTTPException(status_code=400, detail="aggregate must be 'day'")
+
+    # Range predicates on the indexed start_time column
+    in_range = []
+    if start is not None:
+        in_range.append(SlotTime.start_time >= _naive(start))
+    if end is not None:
+        in_range.append(SlotTime.start_time < _naive(end))
+
+    if aggregate == "day":
+        day = func.date(SlotTime.start_time)
+        booked = func.sum(case((SlotTime.is_booked == True, 1), else_=0))
+        rows = await db.execute(
+            select(day.label("day"), func.count().label("total"), booked.label("booked"))
+            .where(*in_range)
+            .group_by(day)
+            .order_by(day)
+        )
+        return ORJSONResponse([
+            {"date": str(row.day), "available": row.total - row.booked, "booked": row.booked}
+            for row in rows
+        ])
+
+    # Plain rows + ORJSONResponse: no ORM identity map and no jsonable_encoder walk
+    slots = await db.execute(
+        select(SlotTime.id, SlotTime.start_time, SlotTime.end_time, SlotTime.professor_id, SlotTime.is_booked)
+        .where(*in_range)
+        .order_by(SlotTime.start_time, SlotTime.id)
+    )
+    return ORJSONResponse([
         {
             "id": slot.id,
             "start_time": slot.start_time.isoformat(),
@@ -176,30 +356,40 @@ def get_slots(request:Request ,db: Session = Depends(get_db)):
             "is_booked": slot.is_booked,
         }
         for slot in slots
-    ]
+    ])
 
 @router.post("/book_slot")
-def book_slot(data: BookSlotRequest, request: Request, db: Session = Depends(get_db)):
-    user = get_logged_in_user(request, db)
+async def book_slot(data: BookSlotRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await get_logged_in_user_async(request, db)
     if user.role != "student":
         raise HTTPException(status_code=403, detail="Only students can book slots")
 
-    slot = db.query(SlotTime).filter(SlotTime.id == data.slot_id, SlotTime.is_booked == False).first()
-    if not slot:
+    # Claim the slot and create the meeting in one transaction. The conditional
+    # UPDATE only matches a free slot, so of two concurrent clicks exactly one wins.
+    professor_id = (await db.execute(
+        update(SlotTime)
+        .where(SlotTime.id == data.slot_id, SlotTime.is_booked == False)
+        .values(is_booked=True)
+        .returning(SlotTime.professor_id)
+        .execution_options(synchronize_session=False)
+    )).scalar_one_or_none()
+    if professor_id is None:
         raise HTTPException(status_code=404, detail="Slot not found or already booked")
 
-    slot.is_booked = True
-    db.commit()
-    
     new_meeting = Meeting(
-        slot_id=slot.id,
+        slot_id=data.slot_id,
         student_id=user.id,
-        professor_id=slot.professor_id,
+        professor_id=professor_id,
         meeting_details=data.meeting_purpose
-        
     )
     db.add(new_meeting)
-    db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A meeting already holds this slot although it was marked free
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Slot already booked")
+    await run_in_threadpool(matching_index.book, data.slot_id, user.id)
 
     return {"message": "Slot booked successfully", "meeting_id": new_meeting.id}
 
@@ -213,6 +403,8 @@ def promote_to_professor(email: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code = 400,detail="user is already a professor")
     user.role = "professor"
     db.commit()
+    principal_cache.set_role(user.id, "professor")  # outstanding tokens still say "student"
+    matching_index.remove_student(user.id)
     
     return {"message": f"{user.name} has been promoted to professor"}
 
@@ -227,14 +419,14 @@ def get_calendar(request: Request, db: Session = Depends(get_db)):
 @router.get("/student/meetings")
 def get_student_meetings(request: Request, db: Session = Depends(get_db)):
     user = get_logged_in_user(request, db)
-    print(f"Logged-in user: {user.id}")  # Debugging
+    logger.debug("Logged-in user: %s", user.id)
 
     
     if user.role != "student":
         raise HTTPException(status_code=403, detail="Only students can view their meetings")
 
     meetings = db.query(Meeting).filter(Meeting.student_id == user.id).all()
-    print(f"Meetings found: {meetings}")  # Debugging
+    logger.debug("Meetings found: %s", meetings)
 
 
     return [
@@ -260,19 +452,17 @@ def delete_meeting(meeting_id: int, request: Request, db: Session = Depends(get_
         raise HTTPException(status_code=404, detail="Meeting not found")
 
     slot = db.query(SlotTime).filter(SlotTime.id == meeting.slot_id).first()
-    if slot:
-        slot.is_booked = False
-
+    freed_slot_id = meeting.slot_id
     db.delete(meeting)
-    db.commit()
+    db.flush()  # the old meeting must leave the slot before a new one can take it
 
-    # 1) See if a user is on waitlist for THIS slot. If so, assign them directly:
+    # 1) See if a user is on waitlist for THIS slot. If so, hand the slot over in
+    #    the same transaction, so it is never free for anyone else in between:
     waitlist_entry = db.query(WaitList).filter(
-        WaitList.slot_id == slot.id
+        WaitList.slot_id == freed_slot_id
     ).order_by(WaitList.created_at.asc()).first()
 
-    if waitlist_entry:
-        slot.is_booked = True
+    if waitlist_entry and slot:
         new_meeting = Meeting(
             slot_id=slot.id,
             student_id=waitlist_entry.user_id,
@@ -282,240 +472,108 @@ def delete_meeting(meeting_id: int, request: Request, db: Session = Depends(get_
         db.add(new_meeting)
         db.delete(waitlist_entry)
         db.commit()
+        matching_index.book(slot.id, waitlist_entry.user_id)
         return {"message": f"Meeting deleted. Slot {slot.id} assigned to waitlisted user {waitlist_entry.user_id}"}
 
-    # 2) Otherwise, loop over the entire waitlist to see if we can seat someone via BFS
-    all_waitlist = db.query(WaitList).order_by(WaitList.created_at.asc()).all()
-    if not all_waitlist:
-        return {"message": "Meeting deleted. No waitlisted user needed that slot."}
-
-    for wl in all_waitlist:
-        waitlisted_user_id = wl.user_id
-
-        # BFS in memory
-        slot_to_user_new = try_single_user_bfs_in_memory(waitlisted_user_id, db)
-        if slot_to_user_new is None:
-            # can't seat this user, check next
-            continue
-
-        # 3) BFS succeeded. Figure out occupant chain for the new occupant mapping
-        from copy import deepcopy
-
-        # Rebuild old occupant assignment
-        user_to_slots, original_slot_to_user = build_matching_graph(db)
-        old_assignments = {}
-        for sid, occupant in original_slot_to_user.items():
-            if occupant is not None:
-                old_assignments[occupant] = sid
-
-        # Build new occupant assignment
-        final_assignments = {}
-        for sid, occupant in slot_to_user_new.items():
-            if occupant is not None:
-                final_assignments[occupant] = sid
-
-        # 4) Identify the chain of users who actually changed slots
-        #    We'll replicate your "move_chain" approach from add_to_waitlist
-        move_chain = []
-        checked_users = set()
-        current_user = waitlisted_user_id
-
-        while current_user in final_assignments and current_user not in checked_users:
-            next_slot_id = final_assignments[current_user]
-            occupant_meeting = db.query(Meeting).filter(
-                Meeting.slot_id == next_slot_id
-            ).first()
-
-            if not occupant_meeting:
-                break
-
-            move_chain.append((
-                occupant_meeting.student_id,
-                occupant_meeting.slot_id,
-                next_slot_id,
-                occupant_meeting.professor_id
-            ))
-            checked_users.add(current_user)
-            current_user = occupant_meeting.student_id
-
-        # filter out the new waitlisted user from the occupant chain
-        affected_users = [
-            user_id for (user_id, _, _, _) in move_chain
-            if user_id != waitlisted_user_id
-        ]
-        correct_new_slots = {
-            u_id: final_assignments[u_id]
-            for u_id in affected_users
-        }
-
-        if move_chain and affected_users:
-            # 5) Create or find a RescheduleRequest
-            from app.auth.models import RescheduleRequest
-
-            existing_request = db.query(RescheduleRequest).filter(
-                RescheduleRequest.user_ids == ",".join(str(u) for u in affected_users),
-                RescheduleRequest.current_slot_ids == ",".join(str(s) for _, s, _, _ in move_chain),
-                RescheduleRequest.new_slot_ids == ",".join(str(correct_new_slots[u]) for u in affected_users)
-            ).first()
-
-            if not existing_request:
-                res_req = RescheduleRequest(
-                    user_ids=",".join(str(u) for u in affected_users),
-                    current_slot_ids=",".join(str(s) for _, s, _, _ in move_chain),
-                    new_slot_ids=",".join(str(correct_new_slots[u]) for u in affected_users),
-                    professor_ids=",".join(str(p) for _, _, _, p in move_chain),
-                    status="Pending"
-                )
-                db.add(res_req)
-                db.commit()
-
-                # send notifications to each occupant
-                for occupant_id in affected_users:
-                    send_notification(
-                        occupant_id,
-                        f"You have a request to move to slot {correct_new_slots[occupant_id]} "
-                        f"(Request ID: {res_req.id}).",
-                        db,
-                        reschedule_id=res_req.id
-                    )
-
-            # 6) The waitlisted user remains unmatched in the DB until acceptance, so keep them in WaitList
-            return {
-                "message": "Created reschedule request. Occupants must accept. No occupant changes applied yet."
-            }
+    if slot:
+        slot.is_booked = False
+    db.commit()
+    matching_index.release(freed_slot_id)
 
-    # If we reach here, no BFS chain for any user
-    return {"message": "Meeting deleted. No waitlisted user could be placed."}
+    # 2) Otherwise the rematch worker looks for a chain of moves that seats a
+    #    waitlisted student (batched with other cancellations and waitlist joins)
+    if not db.query(WaitList.id).first():
+        return {"message": "Meeting deleted. No waitlisted user needed that slot."}
+    rematch_worker.enqueue("slot_freed", freed_slot_id)
+    return {"message": "Meeting deleted. Waitlisted users will be matched to the freed slot shortly."}
 
 @router.get("/get_slots_by_date", dependencies=[Depends(verify_token)])
-def get_slots_by_date(request: Request, date: str, db: Session = Depends(get_db)):
-    user = get_logged_in_user(request, db)
+async def get_slots_by_date(
+    request: Request,
+    date: date,
+    professor_id: Optional[int] = None,
+    after_start: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Slots starting on `date`, ordered by (start_time, id), optionally for one professor.
+    Keyset pagination: pass `limit`, then the last item's start_time/id as after_start/after_id.
+    """
+    await get_logged_in_user_async(request, db)
+
+    # Half-open [day, day + 1) range, so the start_time indexes can be used
+    day_start = datetime.combine(date, datetime.min.time())
+    query = select(
+        SlotTime.id, SlotTime.start_time, SlotTime.end_time, SlotTime.professor_id, SlotTime.is_booked
+    ).where(SlotTime.start_time >= day_start, SlotTime.start_time < day_start + timedelta(days=1))
+
+    if professor_id is not None:
+        query = query.where(SlotTime.professor_id == professor_id)
+    if after_start is not None:
+        after_start = _naive(after_start)
+        if after_id is None:
+            query = query.where(SlotTime.start_time > after_start)
+        else:
+            query = query.where(
+                SlotTime.start_time >= after_start,
+                or_(SlotTime.start_time > after_start, SlotTime.id > after_id),
+            )
 
-    slots = db.query(SlotTime).filter(SlotTime.start_time.startswith(date)).all()
+    query = query.order_by(SlotTime.start_time, SlotTime.id)
+    if limit is not None:
+        query = query.limit(limit)
 
-    return [
+    slots = await db.execute(query)
+    return ORJSONResponse([
         {
             "id": slot.id,
             "start_time": slot.start_time.isoformat(),
             "end_time": slot.end_time.isoformat(),
+            "professor_id": slot.professor_id,
             "is_booked": slot.is_booked,
         }
         for slot in slots
-    ]
+    ])
+
 @router.post("/add_to_waitlist")
-def add_to_waitlist(
+async def add_to_waitlist(
     data: WaitListRequest, 
     request: Request, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = get_logged_in_user(request, db)
+    user = await get_logged_in_user_async(request, db)
     if user.role != "student":
         raise HTTPException(status_code=403, detail="Only students can join waitlist")
 
     slot_id = data.slot_id
 
     # Check if slot exists & is booked
-    slot = db.query(SlotTime).filter(SlotTime.id == slot_id).first()
+    slot = await db.get(SlotTime, slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="Slot not found")
     if not slot.is_booked:
         raise HTTPException(status_code=400, detail="Slot is free; you can book it directly")
 
-    existing_meeting = db.query(Meeting).filter(Meeting.slot_id == slot_id).first()
+    existing_meeting = (await db.execute(
+        select(Meeting).where(Meeting.slot_id == slot_id).limit(1)
+    )).scalar_one_or_none()
     if not existing_meeting:
         raise HTTPException(status_code=400, detail="No active meeting found for this slot")
 
-    # 📊 Before Matching: Show initial graph
-    user_to_slots, slot_to_user = build_matching_graph(db)
-    visualize_matching_graph(user_to_slots, slot_to_user, title="Before Matching")
-
-    # 🔄 Perform bipartite matching
-    before = sum(1 for x in slot_to_user.values() if x is not None)
-    max_bipartite_matching(user_to_slots, slot_to_user)
-    after = sum(1 for x in slot_to_user.values() if x is not None)
-    final_assignments = get_user_assignments(slot_to_user)
-
-    # 📊 After Matching: Show updated graph
-    visualize_matching_graph(user_to_slots, slot_to_user, title="After Matching")
-
-    # 🛑 If no rearrangement found, add to waitlist
-    if user.id not in final_assignments:
-        waitlist_entry = WaitList(slot_id=slot_id, user_id=user.id)
-        db.add(waitlist_entry)
-        db.commit()
-        return {"message": "No available rearrangements. You have been added to the waitlist."}
-
-    # 🚀 Identify users who ACTUALLY need to move (exclude the waitlisted user)
-    move_chain = []
-    checked_users = set()
-    current_user = user.id
-
-    while current_user in final_assignments and current_user not in checked_users:
-        next_slot = final_assignments[current_user]
-        occupant_meeting = db.query(Meeting).filter(Meeting.slot_id == next_slot).first()
-
-        if not occupant_meeting:
-            break  # No further user to move
-
-        move_chain.append((occupant_meeting.student_id, occupant_meeting.slot_id, next_slot, occupant_meeting.professor_id))
-        checked_users.add(current_user)
-        current_user = occupant_meeting.student_id
-
-    # ✅ Filter only affected users (EXCLUDE the original requester)
-    affected_users = [user_id for user_id, _, _, _ in move_chain if user_id != user.id]
-
-    # ✅ Ensure correct new slot assignments
-    correct_new_slots = {user_id: final_assignments[user_id] for user_id in affected_users}
-
-    # 🚀 Debugging
-    print(f"DEBUG: Move Chain = {move_chain}")
-    print(f"DEBUG: Affected Users = {affected_users}")
-    print(f"DEBUG: Correct New Slots = {correct_new_slots}")
-
-    # 🔥 If multiple users need to move, we need approvals from all
-    if move_chain and affected_users:
-        existing_request = db.query(RescheduleRequest).filter(
-            RescheduleRequest.user_ids == ",".join(str(user_id) for user_id in affected_users),
-            RescheduleRequest.current_slot_ids == ",".join(str(current_slot) for _, current_slot, _, _ in move_chain),
-            RescheduleRequest.new_slot_ids == ",".join(str(correct_new_slots[user_id]) for user_id in affected_users),
-        ).first()
-
-        if not existing_request:  # ✅ Prevent duplicate insertions
-            reschedule_request = RescheduleRequest(
-                user_ids=",".join(str(user_id) for user_id in affected_users),
-                current_slot_ids=",".join(str(current_slot) for _, current_slot, _, _ in move_chain),
-                new_slot_ids=",".join(str(correct_new_slots[user_id]) for user_id in affected_users),
-                professor_ids=",".join(str(prof_id) for _, _, _, prof_id in move_chain),
-                status="Pending"
-            )
-            db.add(reschedule_request)
-            db.commit()
-
-            # 🔔 Send notifications to all affected users
-            for user_id in affected_users:
-                send_notification(
-                    user_id,
-                    f"You have a request to move to slot {correct_new_slots[user_id]} (Request ID: {reschedule_request.id}).",
-                    db,
-                    reschedule_id=reschedule_request.id  # Pass the reschedule request ID
-                )
-
-        # ✅ User is waitlisted until all moves are accepted
-        waitlist_entry = WaitList(slot_id=slot_id, user_id=user.id)
-        db.add(waitlist_entry)
-        db.commit()
-
-        return {
-            "message": f"Notified {len(affected_users)} users. User {user.id} is waitlisted until all approve."
-        }
+    waitlist_entry = WaitList(slot_id=slot_id, user_id=user.id)
+    db.add(waitlist_entry)
+    await db.commit()
 
-    return {"message": "Unexpected error in waitlist process."}
+    # 🔄 The rematch worker looks for occupants who could move to make room
+    rematch_worker.enqueue("waitlist_joined", slot_id)
+    return {"message": "You have been added to the waitlist. You'll be notified if a rearrangement frees the slot."}
 
 
 @router.get("/users/{user_id}/preferences")
 def get_preference(user_id:int, db:Session=Depends(get_db)):
     user = db.query(User).filter(User.id==user_id).first()
-    print(user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -543,214 +601,310 @@ def save_preference(user_id: int, data: PreferenceRequest, db: Session = Depends
     new_times = set(datetime.fromisoformat(t) for t in data.time_slots)
 
     # ✅ Append new times instead of deleting everything
-    for new_time in new_times - existing_times:
+    added_times = new_times - existing_times
+    for new_time in added_times:
         db.add(PreferredTime(user_id=user_id, time_slot=new_time))
 
     db.commit()
+    for new_time in added_times:
+        matching_index.add_preference(user_id, new_time)
     return {"message": "Preferences updated successfully"}
 
 
 # Create a notification
 @router.post("/notifications")
 def create_notification(user_id: int, message: str, reschedule_id: int, db: Session = Depends(get_db)):
-    notification = Notification(user_id=user_id, message=message, reschedule_id=reschedule_id)
-    db.add(notification)
-    db.commit()
+    notification = send_notification(user_id, message, db, reschedule_id)
     db.refresh(notification)
     return {"message": "Notification created successfully", "notification": notification}
 
 
 @router.get("/notifications")
-def get_notifications(user_id: int, db: Session = Depends(get_db)):
-    notifications = db.query(Notification).filter(
-        Notification.user_id == user_id
-    ).order_by(Notification.created_at.desc()).all()
+async def get_notifications(
+    user_id: int,
+    unread_only: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    before_created_at: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    The user's notifications, newest first (all of them when `limit` is omitted).
+    Cursor pagination: pass the last item's created_at/id as before_created_at/before_id.
+    """
+    query = select(
+        Notification.id, Notification.message, Notification.is_read,
+        Notification.created_at, Notification.reschedule_id,
+    ).where(Notification.user_id == user_id)
+
+    if unread_only:
+        query = query.where(Notification.is_read == False)
+    if before_created_at is not None:
+        before_created_at = _naive(before_created_at)
+        if before_id is None:
+            query = query.where(Notification.created_at < before_created_at)
+        else:
+            query = query.where(
+                Notification.created_at <= before_created_at,
+                or_(Notification.created_at < before_created_at, Notification.id < before_id),
+            )
 
-    return [
-        {
-            "id": notification.id,
-            "message": notification.message,
-            "is_read": notification.is_read,
-            "created_at": notification.created_at.isoformat(),
-            # ✅ Only include `reschedule_id` if it exists in the model
-            **({"reschedule_id": notification.reschedule_id} if hasattr(notification, "reschedule_id") else {})
-        }
-        for notification in notifications
-    ]
+    query = query.order_by(Notification.created_at.desc(), Notification.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+
+    notifications = await db.execute(query)
+    return ORJSONResponse([notification_payload(notification) for notification in notifications])
+
+
+@router.get("/unread_count")
+async def unread_count(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Badge count: one primary-key lookup in notification_counters.
+    """
+    return {"unread_count": await get_unread_count(db, user_id)}
 
 
 # Mark a notification as read
 @router.post("/notifications/mark_as_read")
 def mark_as_read(notification_id: int, db: Session = Depends(get_db)):
-    notification = db.query(Notification).filter(Notification.id == notification_id).first()
-    if not notification:
+    changed = db.execute(mark_read_update(Notification.id == notification_id)).all()
+    if not changed and not db.query(Notification.id).filter(Notification.id == notification_id).first():
         raise HTTPException(status_code=404, detail="Notification not found")
 
-    notification.is_read = True
+    events = read_events(db, changed)
     db.commit()
+    notification_hub.publish_all(events)
     return {"message": "Notification marked as read"}
 
-@router.post("/reschedule_requests/{request_id}/accept")
-def accept_reschedule_request(request_id: int, request: Request, db: Session = Depends(get_db)):
-    """
-    If all users accept, finalize the reschedule.
-    """
 
-    # ✅ Debug: Print all request IDs before querying
-    all_requests = db.query(RescheduleRequest).all()
-    print(f"DEBUG: Available request IDs: {[r.id for r in all_requests]}")
+# Mark several (or all) of the logged-in user's notifications as read
+@router.post("/notifications/mark_read")
+async def mark_read_bulk(data: MarkReadRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await get_logged_in_user_async(request, db)
+    if not data.all and not data.ids:
+        raise HTTPException(status_code=400, detail="Pass notification ids or all=true")
 
-    res_req = db.query(RescheduleRequest).filter(RescheduleRequest.id == request_id).first()
-    
-    # ✅ Fix: Ensure the request exists
-    if not res_req:
-        raise HTTPException(status_code=404, detail="No such reschedule request found.")
+    criteria = [Notification.user_id == user.id]
+    if not data.all:
+        criteria.append(Notification.id.in_(data.ids))
+    changed = (await db.execute(mark_read_update(*criteria))).all()
 
-    # ✅ Debug: Print current request data
-    print(f"DEBUG: Reschedule Request Found - ID: {res_req.id}, Users: {res_req.user_ids}, Status: {res_req.status}")
+    unread = None
+    if changed:
+        unread = (await db.execute(unread_counter_update(user.id, -len(changed)))).scalar_one_or_none()
+    await db.commit()
 
-    # ✅ Ensure status is pending
-    if res_req.status != "Pending":
-        raise HTTPException(status_code=400, detail="Reschedule request is not pending.")
+    ids = [notification_id for notification_id, _ in changed]
+    if ids:
+        notification_hub.publish(user.id, {"type": "read", "ids": ids, "unread_count": unread})
+    return {"marked_read": len(ids), "unread_count": unread}
 
+def _pending_reschedule_request(request_id: int, request: Request, db: Session):
+    """
+    The pending request (with its moves and approvals) and the caller, who must be one of its occupants.
+    """
     user = get_logged_in_user(request, db)
+    res_req = db.query(RescheduleRequest)\
+        .options(selectinload(RescheduleRequest.moves), selectinload(RescheduleRequest.approvals))\
+        .filter(RescheduleRequest.id == request_id).first()
+    if not res_req:
+        raise HTTPException(status_code=404, detail="No such reschedule request found.")
+    if res_req.status != "Pending":
+        raise HTTPException(status_code=400, detail="Reschedule request is not pending.")
+    if all(move.user_id != user.id for move in res_req.moves):
+        raise HTTPException(status_code=403, detail="You are not the occupant for this request.")
+    return res_req, user
 
-    # ✅ Fix: Ensure `approved_user_ids` exists and is initialized
-    if not hasattr(res_req, "approved_user_ids") or res_req.approved_user_ids is None:
-        res_req.approved_user_ids = ""
-
-    # ✅ Fix: Properly split and clean up spaces in `approved_user_ids`
-    approved_users = [u.strip() for u in res_req.approved_user_ids.split(",") if u]
-    approved_users.append(str(user.id))
-
-    # ✅ Ensure uniqueness in approvals
-    res_req.approved_user_ids = ",".join(set(approved_users))
-    db.commit()
 
-    # ✅ Debug: Show the updated approved users
-    print(f"DEBUG: Updated approved_user_ids = {res_req.approved_user_ids}")
+def _reschedule_busy(request_id: int):
+    logger.warning("Reschedule request %s kept changing under %d attempts", request_id, RESCHEDULE_RETRIES)
+    raise HTTPException(status_code=409, detail="Reschedule request was changed by another participant, please retry.")
 
-    # 🔄 Check if ALL required users have accepted
-    required_users = [u.strip() for u in res_req.user_ids.split(",") if u]
 
-    if set(approved_users) == set(required_users):
-        finalize_reschedule_move(res_req, db)
+@router.post("/reschedule_requests/{request_id}/accept")
+def accept_reschedule_request(request_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Record the caller's approval. Once every occupant has accepted, finalize the reschedule.
 
-        # ✅ Remove reschedule request after success
-        db.delete(res_req)
-        db.commit()
+    Every approval bumps the request's version, so when two occupants accept at
+    once one of them fails its flush (StaleDataError) and retries with the
+    other's approval loaded: the last approval always sees the full set.
+    """
+    for _ in range(RESCHEDULE_RETRIES):
+        res_req, user = _pending_reschedule_request(request_id, request, db)
+        required = {move.user_id for move in res_req.moves}
+        approved = {approval.user_id for approval in res_req.approvals}
+        logger.debug("Reschedule request %s: %d of %d occupants approved", request_id, len(approved), len(required))
+        if user.id in approved and approved < required:
+            return {"message": f"Reschedule request {request_id} partially approved. Waiting for others."}
+
+        try:
+            if user.id not in approved:
+                res_req.approvals.append(RescheduleApproval(user_id=user.id))
+                approved.add(user.id)
+            # 🔄 Check if ALL required users have accepted
+            if approved < required:
+                advance(res_req, "Pending")
+                db.commit()
+                return {"message": f"Reschedule request {request_id} partially approved. Waiting for others."}
+            seated_user_id = finalize_reschedule_move(res_req, db)
+        except (StaleDataError, IntegrityError):
+            db.rollback()
+            logger.info("Reschedule request %s changed during accept, retrying", request_id)
+            continue
 
         # ✅ Notify the waiting user that their slot is now available
-        waitlist_entry = db.query(WaitList).filter(WaitList.slot_id == res_req.current_slot_ids.split(",")[0]).first()
-        if waitlist_entry:
-            send_notification(
-                waitlist_entry.user_id,
-                "Your requested slot is now available!",
-                db,
-                reschedule_id=res_req.id  # Include reschedule ID
-            )
-            db.delete(waitlist_entry)
-            db.commit()
-
+        if seated_user_id is not None:
+            send_notification(seated_user_id, "Your requested slot is now available!", db, reschedule_id=None)
         return {"message": f"Reschedule request {request_id} accepted and finalized."}
-
-    return {"message": f"Reschedule request {request_id} partially approved. Waiting for others."}
+    _reschedule_busy(request_id)
 
 @router.post("/reschedule_requests/{request_id}/reject")
 def reject_reschedule_request(request_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Occupant calls this to reject the move.
     """
-    res_req = db.query(RescheduleRequest).filter(RescheduleRequest.id == request_id).first()
-    if not res_req:
-        raise HTTPException(status_code=404, detail="No such reschedule request found.")
+    for _ in range(RESCHEDULE_RETRIES):
+        res_req, user = _pending_reschedule_request(request_id, request, db)
 
-    if res_req.status != "Pending":
-        raise HTTPException(status_code=400, detail="Reschedule request is not pending.")
+        # Mark it as Rejected; the chain is dead for every occupant, so their prompts go too
+        advance(res_req, "Rejected")
+        events = delete_notifications(db, Notification.reschedule_id == request_id)
+        try:
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            logger.info("Reschedule request %s changed during reject, retrying", request_id)
+            continue
+        notification_hub.publish_all(events)
+        # The request's slots are no longer blocked: another chain may seat the waitlist now
+        rematch_worker.enqueue("request_rejected", None)
+        return {"message": f"Reschedule request {request_id} rejected. No changes made."}
+    _reschedule_busy(request_id)
 
-    user = get_logged_in_user(request, db)
-    if user.id != res_req.user_id:
-        raise HTTPException(status_code=403, detail="You are not the occupant for this request.")
 
-    # Mark it as Rejected
-    res_req.status = "Rejected"
-    db.commit()
-
-    # After successful finalize, remove the reschedule request row altogether
-    db.delete(res_req)
+def _reschedule_conflict(res_req: RescheduleRequest, db: Session, reason: str):
+    """
+    Undo a half-applied finalize, retire the request and answer 409.
+    """
+    db.rollback()
+    logger.info("Reschedule request %s is out of date: %s", res_req.id, reason)
+    advance(res_req, "Stale")
+    events = delete_notifications(db, Notification.reschedule_id == res_req.id)
     db.commit()
-    # Optionally notify the user who wanted the slot that occupant refused
-    
-    occupant_notification = db.query(Notification).filter(Notification.user_id == user.id)\
-        .filter(Notification.message.ilike(f"%Request ID: {request_id}%"))\
-        .first()
-
-    if occupant_notification:
-        db.delete(occupant_notification)
-        db.commit()
-    return {"message": f"Reschedule request {request_id} rejected. No changes made."}
+    notification_hub.publish_all(events)
+    # Its slots are unblocked and the situation changed: look for a chain that still works
+    rematch_worker.enqueue("request_stale", None)
+    raise HTTPException(status_code=409, detail=f"Reschedule request is out of date: {reason}")
 
 
 def finalize_reschedule_move(res_req: RescheduleRequest, db: Session):
     """
-    Actually move the occupant from res_req.current_slot_ids to res_req.new_slot_ids,
-    free the old slot, and assign that old slot to whoever was waiting (the new user).
+    Apply the whole chain in one transaction: every occupant moves to their new
+    slot, and the slot handed over goes to whoever waits for it.
+
+    The statement count doesn't grow with the chain: the meetings and slots it
+    touches and the waitlist head are prefetched with IN queries, the chain is
+    checked in memory and all meetings move in one executemany. Each write is
+    conditional and its row count is checked; if the database no longer looks
+    the way the chain assumed, nothing is applied and the request goes Stale (409).
+    Raises StaleDataError if the request itself changed since it was loaded.
+    Returns the id of the waitlisted user who got the freed slot, if any.
     """
-
-    # ✅ Fix: Handle multiple slot IDs properly
-    current_slot_ids = res_req.current_slot_ids.split(",")  # Convert string to list
-    new_slot_ids = res_req.new_slot_ids.split(",")  # Convert string to list
-
-    if not current_slot_ids or not new_slot_ids:
+    moves = res_req.moves
+    if not moves:
         raise HTTPException(status_code=400, detail="Invalid reschedule request data.")
 
-    for current_slot_id, new_slot_id in zip(current_slot_ids, new_slot_ids):
-        current_slot_id = int(current_slot_id.strip())  # Convert to integer
-        new_slot_id = int(new_slot_id.strip())  # Convert to integer
-
-        # 1. Free occupant's old slot
-        old_slot = db.query(SlotTime).filter(SlotTime.id == current_slot_id).first()
-        if old_slot:
-            old_slot.is_booked = False
-
-        # 2. Mark occupant's new slot as booked
-        new_slot = db.query(SlotTime).filter(SlotTime.id == new_slot_id).first()
-        if new_slot:
-            new_slot.is_booked = True
-
-        # 3. Update occupant's Meeting from the old slot to the new slot
-        occupant_meeting = db.query(Meeting).filter(
-            Meeting.slot_id == current_slot_id
-        ).first()
-
-        if occupant_meeting:
-            occupant_meeting.slot_id = new_slot_id
-
-        # 4. Now that old_slot is freed, assign it to the next waitlisted user
-        waitlist_entry = db.query(WaitList).filter(WaitList.slot_id == current_slot_id)\
-            .order_by(WaitList.created_at.asc()).first()
-
-        if waitlist_entry:
-            new_meeting = Meeting(
-                slot_id=current_slot_id,
-                student_id=waitlist_entry.user_id,
-                professor_id=old_slot.professor_id if old_slot else res_req.professor_ids,
-                meeting_details="(Reschedule auto-booked)"
+    # Only one finalize per request: the versioned flush raises StaleDataError
+    # if the request changed since it was loaded (e.g. the last two approvals raced)
+    advance(res_req, "Finalized")
+    db.flush()
+
+    current_slot_ids = [move.current_slot_id for move in moves]
+    freed_slot_id = current_slot_ids[0]
+    end_slot_id = moves[-1].new_slot_id
+
+    # Prefetch everything the chain touches
+    meeting_ids = {
+        (slot_id, student_id): meeting_id
+        for meeting_id, slot_id, student_id in db.execute(
+            select(Meeting.id, Meeting.slot_id, Meeting.student_id)
+            .where(Meeting.slot_id.in_(current_slot_ids))
+        )
+    }
+    slots = {
+        slot_id: (professor_id, is_booked)
+        for slot_id, professor_id, is_booked in db.execute(
+            select(SlotTime.id, SlotTime.professor_id, SlotTime.is_booked)
+            .where(SlotTime.id.in_(current_slot_ids + [end_slot_id]))
+        )
+    }
+    waitlist_head = db.query(WaitList).filter(WaitList.slot_id == freed_slot_id)\
+        .order_by(WaitList.created_at.asc(), WaitList.id.asc()).first()
+
+    # Check the chain against the prefetched rows before writing anything
+    if slots.get(end_slot_id, (None, True))[1]:
+        _reschedule_conflict(res_req, db, f"slot {end_slot_id} is no longer free")
+    for move in moves:
+        if (move.current_slot_id, move.user_id) not in meeting_ids:
+            _reschedule_conflict(
+                res_req, db, f"user {move.user_id} no longer holds slot {move.current_slot_id}"
             )
-        
-            db.add(new_meeting)
-            if old_slot:
-                old_slot.is_booked = True
 
-            db.delete(waitlist_entry)
+    # The chain ends in a free slot: take it the same way book_slot does
+    taken = db.execute(
+        update(SlotTime)
+        .where(SlotTime.id == end_slot_id, SlotTime.is_booked == False)
+        .values(is_booked=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if taken != 1:
+        _reschedule_conflict(res_req, db, f"slot {end_slot_id} is no longer free")
+
+    # From the end backwards every meeting moves into a slot that was just
+    # vacated, so uq_meetings_slot_id holds after each row of the executemany
+    meetings = Meeting.__table__
+    moved = db.execute(
+        update(meetings)
+        .where(meetings.c.id == bindparam("b_meeting_id"), meetings.c.slot_id == bindparam("b_from_slot_id"))
+        .values(slot_id=bindparam("b_to_slot_id")),
+        [
+            {
+                "b_meeting_id": meeting_ids[(move.current_slot_id, move.user_id)],
+                "b_from_slot_id": move.current_slot_id,
+                "b_to_slot_id": move.new_slot_id,
+            }
+            for move in reversed(moves)
+        ],
+    ).rowcount
+    if moved != len(moves) and db.get_bind().dialect.supports_sane_multi_rowcount:
+        _reschedule_conflict(res_req, db, "a meeting of the chain changed while it was being moved")
+
+    # The slot handed over goes to the first student waiting for it, or becomes free
+    seated_user_id = None
+    if waitlist_head:
+        db.add(Meeting(
+            slot_id=freed_slot_id,
+            student_id=waitlist_head.user_id,
+            professor_id=slots[freed_slot_id][0],
+            meeting_details="(Reschedule auto-booked)"
+        ))
+        seated_user_id = waitlist_head.user_id
+        db.delete(waitlist_head)
+    else:
+        db.execute(
+            update(SlotTime).where(SlotTime.id == freed_slot_id).values(is_booked=False)
+            .execution_options(synchronize_session=False)
+        )
 
     # ✅ **Delete all notifications related to this reschedule request**
-    db.query(Notification).filter(Notification.reschedule_id == res_req.id).delete()
-
-    # 5. Mark the request as Finalized
-    res_req.status = "Finalized"
+    notification_events = delete_notifications(db, Notification.reschedule_id == res_req.id)
     db.commit()
-    
+    notification_hub.publish_all(notification_events)
+    matching_index.sync_slots(db, current_slot_ids + [end_slot_id])
+    return seated_user_id
+
 
 @router.delete("/users/{user_id}/preferences/{pref_id}")
 def delete_preference(user_id: int, pref_id: int, db: Session = Depends(get_db)):
@@ -760,6 +914,52 @@ def delete_preference(user_id: int, pref_id: int, db: Session = Depends(get_db))
     ).first()
     if not pref:
         raise HTTPException(status_code=404, detail="Preference not found")
+    time_slot = pref.time_slot
     db.delete(pref)
     db.commit()
+    matching_index.remove_preference(user_id, time_slot)
     return {"message": "Preference deleted successfully"}
+
+
+@router.post("/matching/reconcile")
+def reconcile_matching_index(request: Request, db: Session = Depends(get_db)):
+    """
+    Check the in-memory matching index against the database and rebuild it on drift.
+    """
+    user = get_verified_user(request, db)
+    if user.role != "professor":
+        raise HTTPException(status_code=403, detail="Only professors can reconcile the matching index")
+    return matching_index.reconcile(db)
+
+
+@router.get("/matching/graph.png")
+def get_matching_graph(request: Request, view: str = "current", db: Session = Depends(get_db)):
+    """
+    Render the matching graph as a PNG: view=current shows today's bookings,
+    view=matched shows the assignment the matching engine would produce.
+    """
+    user = get_verified_user(request, db)
+    if user.role != "professor":
+        raise HTTPException(status_code=403, detail="Only professors can view the matching graph")
+    if view not in ("current", "matched"):
+        raise HTTPException(status_code=400, detail="view must be 'current' or 'matched'")
+    return Response(content=matching_graph_png(view), media_type="image/png")
+
+
+@router.get("/admin/stats")
+def get_admin_stats(request: Request, reset: bool = False, db: Session = Depends(get_db)):
+    """
+    Per-route SQL query counts/durations and the slow-query sample since start (or the last reset).
+    """
+    user = get_verified_user(request, db)
+    if user.role != "professor":
+        raise HTTPException(status_code=403, detail="Only professors can view server stats")
+    stats = {
+        "queries": query_stats.snapshot(),
+        "auth_cache": principal_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "rematch": rematch_worker.stats(),
+    }
+    if reset:
+        query_stats.reset()
+    return stats
@@ -0,0 +1,48 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+
+def expand_weekly(weekdays, first_day, until, day_start, day_end, slot_minutes):
+    """
+    Expand a weekly office-hours rule into (start, end) slots, in order:
+    every date in [first_day, until] whose weekday() is in `weekdays`, cut into
+    back-to-back `slot_minutes` slots between `day_start` and `day_end`.
+    A trailing piece shorter than `slot_minutes` is dropped.
+    """
+    weekdays = set(weekdays)
+    length = timedelta(minutes=slot_minutes)
+    slots = []
+    day = first_day
+    while day <= until:
+        if day.weekday() in weekdays:
+            start = datetime.combine(day, day_start)
+            close = datetime.combine(day, day_end)
+            while start + length <= close:
+                slots.append((start, start + length))
+                start += length
+        day += timedelta(days=1)
+    return slots
+
+
+class SlotIntervalIndex:
+    """
+    Static interval index over existing slots for overlap checks.
+
+    Slots are sorted by start with a running maximum of their ends, so
+    `overlaps(start, end)` is one bisect: among the slots starting before
+    `end`, some slot overlaps [start, end) iff the largest end exceeds `start`.
+    Slots may overlap each other; the running maximum keeps that correct.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self._starts = [start for start, _ in intervals]
+        self._max_ends = list(accumulate((end for _, end in intervals), max))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlaps(self, start, end):
+        before_end = bisect_left(self._starts, end)
+        return before_end > 0 and self._max_ends[before_end - 1] > start
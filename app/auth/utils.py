@@ -1,61 +1,44 @@
+import logging
 import os
 from dotenv import load_dotenv
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-import jwt
-from datetime import datetime
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-import networkx as nx
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import os
+from sqlalchemy.ext.asyncio import AsyncSession
 from collections import deque, defaultdict
 
 from app.auth.models import (
-    PreferredTime, SlotTime, Meeting, Notification, User, WaitList
+    PreferredTime, SlotTime, Meeting, Notification, NotificationCounter, User, WaitList
 )
+from app.auth.csr_graph import csr_matching
+from app.auth.notification_hub import notification_hub, notification_payload
+from app.auth.passwords import pwd_context
+from app.auth.principals import decode_principal
 
 load_dotenv()
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+logger = logging.getLogger(__name__)
+
+# "kuhn" (recursive DFS, the original engine), "csr" (the same search on a
+# compact array graph) or "hopcroft_karp". Only the "matched" graph view runs a
+# full matching; the rematch worker uses promotion chains instead
+MATCHING_ENGINE = os.getenv("MATCHING_ENGINE", "kuhn")
 
 ouat2_schema = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
 def verify_token(token: str = Depends(ouat2_schema)):
-    print("Incoming token:", token)
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        exp = payload.get("exp")
-        if exp:
-            print("Token expiry:", datetime.fromtimestamp(exp))
-        else:
-            print("No expiration found in token payload")
-        print("Current time:", datetime.utcnow())
-
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        return email
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="token expired")
-    except jwt.PyJWTError as e:
-        print("JWT error:", e)
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    """
+    Dependency guarding a route: 401 unless the bearer token is valid. Returns the
+    token's `sub`; the decoded principal is cached, so the route's own
+    get_logged_in_user call doesn't decode it again.
+    """
+    return str(decode_principal(token).id)
 
 
+# Blocking bcrypt (scripts, tests); request handlers use app.auth.passwords.password_pool
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -75,35 +58,34 @@ def build_matching_graph(db: Session):
 
     # 1. Initialize the adjacency dict for all *students*
     user_to_slots = {}  # { user_id: [slot_id, slot_id, ...] }
-    all_students = db.query(User).filter(User.role == "student").all()
-    for student in all_students:
-        user_to_slots[student.id] = []
+    all_students = db.query(User.id).filter(User.role == "student").all()
+    for (student_id,) in all_students:
+        user_to_slots[student_id] = []
 
     # 2. Populate user_to_slots from PreferredTime
-    #    For each PreferredTime, find a SlotTime with the same start_time
-    preferred_rows = db.query(PreferredTime).all()
-    for pref in preferred_rows:
-        user_id = pref.user_id
+    #    One join on the indexed slot_times.start_time maps every preference to
+    #    every slot starting at that time (outer join keeps unmatched preferences)
+    preferred_rows = (
+        db.query(PreferredTime.user_id, SlotTime.id)
+        .outerjoin(SlotTime, SlotTime.start_time == PreferredTime.time_slot)
+        .order_by(PreferredTime.id, SlotTime.id)
+        .all()
+    )
+    seen = set()
+    for user_id, slot_id in preferred_rows:
         # Make sure this user is in user_to_slots (they might have no other preferences yet)
-        if user_id not in user_to_slots:
-            user_to_slots[user_id] = []
-
-        matching_slot = db.query(SlotTime).filter(SlotTime.start_time == pref.time_slot).first()
-        if matching_slot:
-            if matching_slot.id not in user_to_slots[user_id]:
-                user_to_slots[user_id].append(matching_slot.id)
+        slots = user_to_slots.setdefault(user_id, [])
+        if slot_id is not None and (user_id, slot_id) not in seen:
+            seen.add((user_id, slot_id))
+            slots.append(slot_id)
 
     # 3. Build slot_to_user from existing meetings
     slot_to_user = {}  # { slot_id: occupant_user_id or None }
-    all_slots = db.query(SlotTime).all()
-    for slot in all_slots:
-        slot_to_user[slot.id] = None  # default to free
+    for (slot_id,) in db.query(SlotTime.id).all():
+        slot_to_user[slot_id] = None  # default to free
 
     # 4. Fill occupant info for booked slots
-    booked_meetings = db.query(Meeting).all()
-    for meeting in booked_meetings:
-        slot_id = meeting.slot_id
-        student_id = meeting.student_id
+    for slot_id, student_id in db.query(Meeting.slot_id, Meeting.student_id).all():
         # Mark who is occupying that slot
         slot_to_user[slot_id] = student_id
 
@@ -126,38 +108,53 @@ def _find_augmenting_path(user_id, user_to_slots, slot_to_user, visited):
             # ✅ Free the previous slot
             for prev_slot, prev_user in slot_to_user.items():
                 if prev_user == user_id:
-                    print(f"🔄 User {user_id} moves from Slot {prev_slot} to Slot {slot_id}")
+                    logger.debug("🔄 User %s moves from Slot %s to Slot %s", user_id, prev_slot, slot_id)
                     slot_to_user[prev_slot] = None  # Free old slot
                     break
 
             slot_to_user[slot_id] = user_id
-            print(f"✅ Assigned User {user_id} to Slot {slot_id}")
+            logger.debug("✅ Assigned User %s to Slot %s", user_id, slot_id)
             return True
 
         # If the slot is occupied, try to displace the occupant
         elif occupant != user_id:  # Prevent infinite loops
-            print(f"🔄 Trying to move User {occupant} to free up Slot {slot_id} for User {user_id}")
+            logger.debug("🔄 Trying to move User %s to free up Slot %s for User %s", occupant, slot_id, user_id)
 
             if _find_augmenting_path(occupant, user_to_slots, slot_to_user, visited):
                 # ✅ Free the previous slot
                 for prev_slot, prev_user in slot_to_user.items():
                     if prev_user == user_id:
-                        print(f"🔄 User {user_id} moves from Slot {prev_slot} to Slot {slot_id}")
+                        logger.debug("🔄 User %s moves from Slot %s to Slot %s", user_id, prev_slot, slot_id)
                         slot_to_user[prev_slot] = None  # Free old slot
                         break
 
-                print(f"✅ Moved User {occupant} to a new slot, now assigning User {user_id} to Slot {slot_id}")
+                logger.debug("✅ Moved User %s to a new slot, now assigning User %s to Slot %s", occupant, user_id, slot_id)
                 slot_to_user[slot_id] = user_id
                 return True
             else:
-                print(f"❌ User {occupant} could not be moved, Slot {slot_id} remains occupied")
+                logger.debug("❌ User %s could not be moved, Slot %s remains occupied", occupant, slot_id)
 
     return False
 
 
 
 
-def max_bipartite_matching(user_to_slots, slot_to_user):
+def max_bipartite_matching(user_to_slots, slot_to_user, engine=None):
+    """
+    Run the configured matching engine (MATCHING_ENGINE) on the graph.
+    Updates slot_to_user in place and returns the number of matches found.
+    """
+    engine = engine or MATCHING_ENGINE
+    if engine == "hopcroft_karp":
+        return hopcroft_karp_matching(user_to_slots, slot_to_user)
+    if engine == "csr":
+        return csr_matching(user_to_slots, slot_to_user)
+    if engine != "kuhn":
+        raise ValueError(f"Unknown matching engine: {engine}")
+    return _kuhn_matching(user_to_slots, slot_to_user)
+
+
+def _kuhn_matching(user_to_slots, slot_to_user):
     match_count = 0
     
     # Sort user IDs in descending order so the highest ID user (4) is tried first
@@ -165,20 +162,112 @@ def max_bipartite_matching(user_to_slots, slot_to_user):
         visited = set()
         
         # 🚀 Debug before calling DFS
-        print(f"🔍 Checking match for User {user_id}: Current Assignments = {slot_to_user}")
+        logger.debug("🔍 Checking match for User %s: Current Assignments = %s", user_id, slot_to_user)
         
         if _find_augmenting_path(user_id, user_to_slots, slot_to_user, visited):
             match_count += 1
             
             # 🚀 Debug after finding a match
-            print(f"✅ Match found! Updated Assignments = {slot_to_user}")
+            logger.debug("✅ Match found! Updated Assignments = %s", slot_to_user)
 
     return match_count
 
 
+def hopcroft_karp_matching(user_to_slots, slot_to_user):
+    """
+    Iterative Hopcroft-Karp, starting from the occupants already in slot_to_user.
+
+    Each phase runs a BFS from every unmatched user to layer the graph, then
+    finds vertex-disjoint shortest augmenting paths with an explicit stack, so
+    long displacement chains never touch Python's recursion limit. A reverse
+    user_slot map replaces the slot_to_user scans of _find_augmenting_path.
+    Seated users are never unseated, only moved along augmenting paths.
+
+    Updates slot_to_user in place and returns the number of newly matched users.
+    """
+    user_slot = {}  # { user_id: slot_id } for the slot each user can be moved out of
+    for slot_id, occupant in slot_to_user.items():
+        if occupant is not None:
+            # A user holding several slots only moves out of the last one;
+            # the others stay locked, as get_user_assignments reports one slot per user
+            user_slot[occupant] = slot_id
 
+    users = sorted(user_to_slots.keys(), reverse=True)
+    infinity = float("inf")
+    match_count = 0
 
+    while True:
+        # BFS: layer users by the length of their shortest alternating path
+        dist = {}
+        queue = deque()
+        for user_id in users:
+            if user_id not in user_slot:
+                dist[user_id] = 0
+                queue.append(user_id)
+
+        path_length = None
+        while queue:
+            user_id = queue.popleft()
+            if path_length is not None and dist[user_id] >= path_length:
+                continue
+            for slot_id in user_to_slots.get(user_id, []):
+                occupant = slot_to_user.get(slot_id)
+                if occupant is None:
+                    if path_length is None:
+                        path_length = dist[user_id] + 1
+                elif user_slot.get(occupant) == slot_id and occupant not in dist:
+                    dist[occupant] = dist[user_id] + 1
+                    queue.append(occupant)
+
+        if path_length is None:
+            return match_count
+
+        # DFS: follow the layers from each free user with an explicit stack
+        position = dict.fromkeys(dist, 0)
+        for root in users:
+            if dist.get(root) != 0:
+                continue
+
+            stack = [root]
+            path_slots = []
+            while stack:
+                user_id = stack[-1]
+                slots = user_to_slots.get(user_id, [])
+                next_user = None
+                augmenting_slot = None
+
+                while position[user_id] < len(slots):
+                    slot_id = slots[position[user_id]]
+                    position[user_id] += 1
+                    occupant = slot_to_user.get(slot_id)
+                    if occupant is None:
+                        if dist[user_id] + 1 == path_length:
+                            augmenting_slot = slot_id
+                            break
+                    elif (user_slot.get(occupant) == slot_id
+                          and dist.get(occupant, infinity) == dist[user_id] + 1):
+                        next_user = occupant
+                        path_slots.append(slot_id)
+                        break
 
+                if augmenting_slot is not None:
+                    # Shift everyone on the path one slot forward
+                    path_slots.append(augmenting_slot)
+                    for path_user, path_slot in zip(stack, path_slots):
+                        slot_to_user[path_slot] = path_user
+                        user_slot[path_user] = path_slot
+                        dist[path_user] = infinity  # keep paths vertex-disjoint
+                    match_count += 1
+                    break
+
+                if next_user is not None:
+                    stack.append(next_user)
+                else:
+                    # Dead end: never revisit this user in this phase
+                    dist[user_id] = infinity
+                    stack.pop()
+                    if path_slots:
+                        path_slots.pop()
 
 
 def get_user_assignments(slot_to_user):
@@ -190,130 +279,133 @@ def get_user_assignments(slot_to_user):
         if occupant is not None:
             user_assignment[occupant] = slot_id
             
-    print(f"🚀 DEBUG: Final Assignments = {user_assignment}")  # Force debug print
+    logger.debug("Final Assignments = %s", user_assignment)
     return user_assignment
 
 
 
 
 
-def send_notification(user_id, message, db, reschedule_id):
-    notif = Notification(
-        user_id=user_id,
-        message=message,
-        reschedule_id=reschedule_id
+def unread_counter_update(user_id, delta):
+    """
+    UPDATE adding `delta` to the user's unread counter, returning the new count
+    (nothing is returned while the counter hasn't been initialised, see get_unread_count).
+    """
+    return (
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread=NotificationCounter.unread + delta)
+        .returning(NotificationCounter.unread)
     )
-    db.add(notif)
-    db.commit()
-    print(f"✅ Notification saved for User {user_id}: {message} (Reschedule ID: {reschedule_id})")
 
 
-def visualize_matching_graph(user_to_slots, slot_to_user, title="Matching Graph"):
+def unread_counters_update(deltas):
     """
-    Create a bipartite graph visualization before/after matching.
+    One UPDATE adding deltas[user_id] to each user's unread counter, returning
+    (user_id, unread) for the counters that exist.
     """
-
-    G = nx.DiGraph()
-
-    # user nodes
-    for user in user_to_slots:
-        G.add_node(f"User {user}", color="blue", bipartite=0)
-
-    # slot nodes
-    for slot in slot_to_user:
-        G.add_node(f"Slot {slot}", color="green", bipartite=1)
-
-    # edges for preferences
-    for user, slots in user_to_slots.items():
-        for slot_id in slots:
-            G.add_edge(f"User {user}", f"Slot {slot_id}", color="gray")
-
-    # edges for final assignment
-    for slot_id, occupant_id in slot_to_user.items():
-        if occupant_id is not None:
-            G.add_edge(f"User {occupant_id}", f"Slot {slot_id}", color="red", weight=2)
-
-    pos = nx.bipartite_layout(G, nodes=[f"User {u}" for u in user_to_slots])
-    colors = [G.nodes[n]["color"] for n in G.nodes]
-    edge_colors = [G[u][v]["color"] for u, v in G.edges]
-
-    plt.figure(figsize=(10, 6))
-    nx.draw(
-        G, pos, with_labels=True, node_color=colors, edge_color=edge_colors,
-        node_size=2000, font_size=10, font_weight="bold"
+    return (
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id.in_(deltas))
+        .values(unread=NotificationCounter.unread + case(deltas, value=NotificationCounter.user_id, else_=0))
+        .returning(NotificationCounter.user_id, NotificationCounter.unread)
+        .execution_options(synchronize_session=False)
     )
-    plt.title(title)
 
-    image_path = f"{title.replace(' ', '_')}.png"
-    plt.savefig(image_path)
-    plt.close()
-    print(f"✅ Graph saved: {image_path}")
 
-    if os.name == "nt":  # Windows
-        os.system(f"start {image_path}")
-    elif os.name == "posix":  # macOS/Linux
-        os.system(f"open {image_path}")
-
-
-def try_single_user_bfs_in_memory(user_id: int, db: Session):
+def mark_read_update(*criteria):
     """
-    Attempt to seat this ONE user (user_id) by displacing existing occupants -- in memory only.
-    Returns the new 'slot_to_user' mapping if BFS succeeded, or None if no chain found.
-    Does NOT update the DB physically. That must happen after acceptance.
+    UPDATE marking the matching *unread* notifications as read, returning (id, user_id)
+    of each row that actually changed, so counters move only on real transitions.
     """
+    return (
+        update(Notification)
+        .where(Notification.is_read == False, *criteria)
+        .values(is_read=True)
+        .returning(Notification.id, Notification.user_id)
+        .execution_options(synchronize_session=False)
+    )
 
-    # 1) Build the adjacency from your existing function
-    user_to_slots, slot_to_user = build_matching_graph(db)
 
-    visited_users = set()
-    visited_slots = set()
-    predecessor = {}
-    queue = deque()
-    queue.append(("U", user_id))
-    visited_users.add(user_id)
+def read_events(db: Session, changed_rows):
+    """
+    Apply the counter side of a mark-read (rows from mark_read_update) and return the
+    hub events to publish once the transaction is committed.
+    """
+    ids_by_user = defaultdict(list)
+    for notification_id, user_id in changed_rows:
+        ids_by_user[user_id].append(notification_id)
+    if not ids_by_user:
+        return []
+    counts = dict(db.execute(
+        unread_counters_update({user_id: -len(ids) for user_id, ids in ids_by_user.items()})
+    ).all())
+    return [
+        (user_id, {"type": "read", "ids": ids, "unread_count": counts.get(user_id)})
+        for user_id, ids in ids_by_user.items()
+    ]
+
+
+def delete_notifications(db: Session, *criteria):
+    """
+    Delete the matching notifications, keeping the unread counters in step
+    (one DELETE and one UPDATE, however many users are affected). Returns the hub events to publish once the transaction is committed.
+    """
+    rows = db.execute(
+        delete(Notification).where(*criteria)
+        .returning(Notification.id, Notification.user_id, Notification.is_read)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    ids_by_user = defaultdict(list)
+    unread_by_user = defaultdict(int)
+    for row in rows:
+        ids_by_user[row.user_id].append(row.id)
+        if not row.is_read:
+            unread_by_user[row.user_id] -= 1
+    counts = {}
+    if unread_by_user:
+        counts = dict(db.execute(unread_counters_update(unread_by_user)).all())
+    return [
+        (user_id, {"type": "deleted", "ids": ids, "unread_count": counts.get(user_id)})
+        for user_id, ids in ids_by_user.items()
+    ]
+
+
+async def get_unread_count(db: AsyncSession, user_id):
+    """
+    The user's unread count from notification_counters. The first call for a user
+    counts the unread rows once (through the user_id/is_read index) and stores it.
+    """
+    query = select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    count = (await db.execute(query)).scalar_one_or_none()
+    if count is not None:
+        return count
 
-    free_slot_found = None
+    count_unread = select(literal(user_id), func.count()).where(
+        Notification.user_id == user_id, Notification.is_read == False
+    )
+    try:
+        await db.execute(
+            insert(NotificationCounter).from_select(["user_id", "unread"], count_unread)
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()  # another request initialised it first
+    return (await db.execute(query)).scalar_one()
 
-    while queue and (free_slot_found is None):
-        node_type, node_id = queue.popleft()
-        if node_type == "U":
-            # BFS outward from a user node
-            for slot_id in user_to_slots.get(node_id, []):
-                if slot_id in visited_slots:
-                    continue
 
-                occupant = slot_to_user.get(slot_id)
-                if occupant is None:
-                    # Found a free slot => BFS success
-                    predecessor[("S", slot_id)] = ("U", node_id)
-                    free_slot_found = slot_id
-                    break
-                else:
-                    # Slot is occupied => attempt to displace occupant
-                    predecessor[("S", slot_id)] = ("U", node_id)
-                    visited_slots.add(slot_id)
-
-                    if occupant not in visited_users:
-                        visited_users.add(occupant)
-                        predecessor[("U", occupant)] = ("S", slot_id)
-                        queue.append(("U", occupant))
-
-    if free_slot_found is None:
-        # No augmenting path
-        return None
-
-    # 2) Reconstruct path in memory & flip occupant edges
-    cur_node = ("S", free_slot_found)
-    while cur_node in predecessor:
-        prev_node = predecessor[cur_node]
-        if cur_node[0] == "S" and prev_node[0] == "U":
-            occupant_user = prev_node[1]
-            slot_to_user[cur_node[1]] = occupant_user
-            cur_node = prev_node
-        elif cur_node[0] == "U" and prev_node[0] == "S":
-            old_slot_id = prev_node[1]
-            slot_to_user[old_slot_id] = None
-            cur_node = prev_node
-
-    # 3) Return the new occupant arrangement in memory
-    return slot_to_user
\ No newline at end of file
+def send_notification(user_id, message, db, reschedule_id):
+    notif = Notification(
+        user_id=user_id,
+        message=message,
+        reschedule_id=reschedule_id
+    )
+    db.add(notif)
+    db.flush()
+    payload = notification_payload(notif)  # before commit expires the attributes
+    unread_count = db.execute(unread_counter_update(user_id, 1)).scalar_one_or_none()
+    db.commit()
+    notification_hub.publish(user_id, {"type": "created", "notification": payload, "unread_count": unread_count})
+    logger.debug("✅ Notification saved for User %s: %s (Reschedule ID: %s)", user_id, message, reschedule_id)
+    return notif
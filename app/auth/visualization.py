@@ -0,0 +1,83 @@
+import io
+import threading
+
+from app.auth.matching_index import matching_index
+from app.auth.utils import max_bipartite_matching
+
+# { view: (graph_version, png_bytes) }
+_png_cache = {}
+_cache_lock = threading.Lock()
+
+
+def render_matching_graph(user_to_slots, slot_to_user, title="Matching Graph"):
+    """
+    Draw the bipartite matching graph and return it as PNG bytes.
+    Preference edges are gray, assignments are red.
+    """
+    # Imported here so workers that never draw a graph don't pay for them at startup
+    import networkx as nx
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    G = nx.DiGraph()
+
+    # user nodes
+    for user in user_to_slots:
+        G.add_node(f"User {user}", color="blue", bipartite=0)
+
+    # slot nodes
+    for slot in slot_to_user:
+        G.add_node(f"Slot {slot}", color="green", bipartite=1)
+
+    # edges for preferences
+    for user, slots in user_to_slots.items():
+        for slot_id in slots:
+            G.add_edge(f"User {user}", f"Slot {slot_id}", color="gray")
+
+    # edges for final assignment
+    for slot_id, occupant_id in slot_to_user.items():
+        if occupant_id is not None:
+            G.add_edge(f"User {occupant_id}", f"Slot {slot_id}", color="red", weight=2)
+
+    pos = nx.bipartite_layout(G, nodes=[f"User {u}" for u in user_to_slots])
+    colors = [G.nodes[n].get("color", "blue") for n in G.nodes]
+    edge_colors = [G[u][v]["color"] for u, v in G.edges]
+
+    # Figure + Agg canvas instead of pyplot: no global state, safe in worker threads
+    figure = Figure(figsize=(10, 6))
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    nx.draw(
+        G, pos, ax=ax, with_labels=True, node_color=colors, edge_color=edge_colors,
+        node_size=2000, font_size=10, font_weight="bold"
+    )
+    ax.set_title(title)
+
+    buffer = io.BytesIO()
+    canvas.print_png(buffer)
+    return buffer.getvalue()
+
+
+def matching_graph_png(view="current"):
+    """
+    PNG of the matching index graph, cached until the index version changes.
+    view="current" draws the booked occupants, view="matched" the result of
+    running the matching engine on a copy of the graph.
+    """
+    version, user_to_slots, slot_to_user = matching_index.versioned_snapshot()
+
+    with _cache_lock:
+        cached = _png_cache.get(view)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    if view == "matched":
+        max_bipartite_matching(user_to_slots, slot_to_user)
+        title = "After Matching"
+    else:
+        title = "Before Matching"
+    png = render_matching_graph(user_to_slots, slot_to_user, title=title)
+
+    with _cache_lock:
+        _png_cache[view] = (version, png)
+    return png
@@ -1,17 +1,181 @@
+import logging
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateColumn
 from app.auth.models import Base
+from app.instrumentation import instrument_engine
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL") 
 
-engine = create_engine(DATABASE_URL,echo=True)
+# Log every SQL statement (slow; for debugging only)
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+
+# Connection pool (ignored for in-memory SQLite, which needs a single connection)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite profile: "production" (WAL + tuned pragmas) or "default" (SQLite's own settings)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+
+def _is_memory_sqlite(url):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url, is_async=False):
+    """
+    Pool settings for create_engine / create_async_engine, from the DB_POOL_* env vars.
+    """
+    if _is_memory_sqlite(url):
+        return {}
+    options = {}
+    if is_async and make_url(url).get_backend_name() == "sqlite":
+        # aiosqlite defaults to NullPool, i.e. a new connection (and PRAGMAs) per request
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return {
+        **options,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": make_url(url).get_backend_name() != "sqlite",
+    }
+
+
+def sqlite_pragmas():
+    """
+    The PRAGMAs of the production SQLite profile, in the order they are applied.
+    """
+    return [
+        ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),  # first, so the others wait for locks too
+        ("journal_mode", "WAL"),         # readers no longer wait for writers
+        ("synchronous", "NORMAL"),       # safe with WAL, fsync only at checkpoints
+        ("mmap_size", SQLITE_MMAP_SIZE),
+        ("cache_size", -SQLITE_CACHE_SIZE_KB),  # negative = size in KiB
+        ("temp_store", "MEMORY"),
+    ]
+
+
+def apply_sqlite_profile(engine):
+    """
+    Run the production PRAGMAs on every new connection of a SQLite engine.
+    Pass `async_engine.sync_engine` for async engines.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = sqlite_pragmas()
+    if _is_memory_sqlite(engine.url):
+        pragmas = [p for p in pragmas if p[0] not in ("journal_mode", "mmap_size")]
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO, **engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url):
+    """
+    Derive the async driver URL (aiosqlite / asyncpg) from DATABASE_URL.
+    """
+    url = make_url(url)
+    if url.drivername in ("sqlite", "sqlite+pysqlite"):
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        return url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=SQL_ECHO, **engine_options(ASYNC_DATABASE_URL, is_async=True)
+)
+
+if SQLITE_PROFILE == "production":
+    apply_sqlite_profile(engine)
+    apply_sqlite_profile(async_engine.sync_engine)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# expire_on_commit=False: async sessions can't lazy-load attributes after a commit
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base.metadata.create_all(bind=engine)
 
+
+def ensure_columns(bind):
+    """
+    create_all() doesn't alter existing tables either: columns added to the models
+    later are added here. A new NOT NULL column needs a server_default so the
+    existing rows get a value.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.error("Cannot add NOT NULL column %s.%s without a server_default", table.name, column.name)
+                continue
+            ddl = CreateColumn(column).compile(dialect=bind.dialect)
+            with bind.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            logger.info("Added column %s.%s", table.name, column.name)
+
+
+# Indexes earlier versions created that the models no longer declare
+RETIRED_INDEXES = (
+    "ix_notifications_unread_user_id_created_at",
+    "ix_reschedule_moves_current_slot_id_user_id",
+)
+
+
+def ensure_indexes(bind):
+    """
+    create_all() skips tables that already exist, so indexes added to the models
+    later are created here for existing databases (e.g. the bundled meetly.db),
+    and retired ones are dropped.
+    """
+    with bind.begin() as connection:
+        for name in RETIRED_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+            except IntegrityError:
+                # A unique index the existing rows violate: keep serving, but say so loudly
+                logger.error("Could not create unique index %s: existing rows violate it", index.name)
+
+
+ensure_columns(engine)
+ensure_indexes(engine)
+
@@ -1,21 +1,84 @@
+import logging
+import os
+
+# NiceGUI imports matplotlib at startup for ui.pyplot unless told otherwise; Meetly
+# never uses it, and the matching graph renderer imports matplotlib on first use.
+os.environ.setdefault("MATPLOTLIB", "false")
+
 from fastapi import FastAPI
 from nicegui import ui
 from app.auth.routes import router as auth_router
-from app.db import engine, Base
+from app.db import engine, Base, SessionLocal
+from app.auth.matching_index import matching_index
+from app.auth.passwords import password_pool
+from app.auth.rematch import rematch_worker
+from app.auth.reschedule import backfill_legacy_requests
+from app.instrumentation import QueryStatsMiddleware
+from app.ui.api import close_api_client, init_api_client
 from app.ui.pages.login import login_page
 from app.ui.pages.signup import signup_page
 from app.ui.pages.calendar import calendar_page
 from fastapi.staticfiles import StaticFiles
 
+# App logs (matching steps, auth failures, ...) are DEBUG; slow queries are WARNING
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+
 # Create all tables
 Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI()
 
+# Per-route SQL query counts and timings (GET /api/auth/admin/stats)
+app.add_middleware(QueryStatsMiddleware)
+
 # Include authentication routes
 app.include_router(auth_router, prefix="/api/auth")
 
+
+@app.on_event("startup")
+def load_matching_index():
+    # Build the in-memory matching graph once; routes keep it current afterwards
+    db = SessionLocal()
+    try:
+        backfill_legacy_requests(db)
+        matching_index.rebuild(db)
+    finally:
+        db.close()
+
+
+# NiceGUI pages call the API in-process through this app
+init_api_client(app)
+
+
+@app.on_event("shutdown")
+async def shutdown_api_client():
+    await close_api_client()
+
+
+@app.on_event("startup")
+def start_password_pool():
+    password_pool.start()
+
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    password_pool.shutdown()
+
+
+@app.on_event("startup")
+async def start_rematch_worker():
+    # Matching after cancellations and waitlist joins runs here, batched
+    rematch_worker.start()
+    # One pass over the index load_matching_index just built, for waitlists left unmatched while down
+    rematch_worker.enqueue("startup", None)
+
+
+@app.on_event("shutdown")
+async def stop_rematch_worker():
+    await rematch_worker.stop()
+
+
 # Register pages
 login_page()
 signup_page()
@@ -21,27 +21,19 @@ document.addEventListener("DOMContentLoaded", function () {
     
     events: async function (fetchInfo, successCallback, failureCallback) {
       try {
-        const response = await fetch("/api/auth/get_slots", {
+        // 🔹 Per-day slot counts for the visible range only (aggregated server-side)
+        const params = new URLSearchParams({
+          start: fetchInfo.startStr,
+          end: fetchInfo.endStr,
+          aggregate: "day",
+        });
+        const response = await fetch(`/api/auth/get_slots?${params}`, {
           method: "GET",
           headers: {
             Authorization: `Bearer ${localStorage.getItem("token")}`,
           },
         });
-        const slots = await response.json();
-
-        // 🔹 Count slots per day
-        const slotsByDate = {};
-        slots.forEach((slot) => {
-          const date = slot.start_time.split("T")[0];
-          if (!slotsByDate[date]) {
-            slotsByDate[date] = { available: 0, booked: 0 };
-          }
-          if (slot.is_booked) {
-            slotsByDate[date].booked += 1;
-          } else {
-            slotsByDate[date].available += 1;
-          }
-        });
+        const days = await response.json();
 
         // 🎨 Gradient colors for available and booked slots
         const gradientAvailable = "linear-gradient(135deg, #3b82f6, #8b5cf6)"; // Blue to Purple
@@ -49,9 +41,9 @@ document.addEventListener("DOMContentLoaded", function () {
           "linear-gradient(135deg,rgb(151, 249, 22), #dc2626)"; // Orange to Red
 
         // 🔹 Create events showing slot count per date
-        let events = Object.keys(slotsByDate).map((date) => ({
-          title: `📅 ${slotsByDate[date].available} Available / ${slotsByDate[date].booked} Booked`,
-          start: date, 
+        let events = days.map((day) => ({
+          title: `📅 ${day.available} Available / ${day.booked} Booked`,
+          start: day.date,
           backgroundColor: "#8b5cf6",
           textColor: "white",
         }));
@@ -81,20 +73,16 @@ document.addEventListener("DOMContentLoaded", function () {
       );
     } else if (userRole === "student") {
       console.log("Student clicked a date:", info.dateStr);
-      // Fetch available slots for the selected date
-      fetch("/api/auth/get_slots", {
+      // Fetch the slots of the selected date (e.g. "2025-02-23")
+      const params = new URLSearchParams({ date: info.dateStr });
+      fetch(`/api/auth/get_slots_by_date?${params}`, {
         method: "GET",
         headers: {
           Authorization: `Bearer ${localStorage.getItem("token")}`,
         },
       })
         .then((response) => response.json())
-        .then((slots) => {
-          // Filter slots by clicked date
-          const dateStr = info.dateStr; // e.g. "2025-02-23"
-          const availableSlots = slots.filter((slot) =>
-            slot.start_time.startsWith(dateStr)
-          );
+        .then((availableSlots) => {
           if (availableSlots.length > 0) {
             // Pass the slots to open_create_meeting_model
             fetch("/open_create_meeting_model", {
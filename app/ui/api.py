@@ -0,0 +1,52 @@
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "asgi" calls the FastAPI app in-process (no sockets); "http" goes over the network
+UI_API_TRANSPORT = os.getenv("UI_API_TRANSPORT", "asgi")
+# Where the API lives in "http" mode (and the nominal host in "asgi" mode)
+UI_API_BASE_URL = os.getenv("UI_API_BASE_URL", "http://127.0.0.1:8000")
+
+_app = None
+_client = None
+
+
+def init_api_client(app):
+    """
+    Register the FastAPI app the pages call in "asgi" mode (done once in app.main).
+    """
+    global _app
+    _app = app
+
+
+def api_client() -> httpx.AsyncClient:
+    """
+    The app-lifetime client the NiceGUI pages use for /api/... calls.
+
+    In "asgi" mode requests go straight into the FastAPI app in this process,
+    skipping TCP and the server's HTTP parsing. In "http" mode (or before the
+    app is registered) it is one pooled keep-alive client instead of a new
+    connection per call.
+    """
+    global _client
+    if _client is None:
+        if UI_API_TRANSPORT == "asgi" and _app is not None:
+            # Unhandled server errors come back as 500s, as they would over HTTP
+            transport = httpx.ASGITransport(app=_app, raise_app_exceptions=False)
+            _client = httpx.AsyncClient(transport=transport, base_url=UI_API_BASE_URL)
+        else:
+            _client = httpx.AsyncClient(
+                base_url=UI_API_BASE_URL,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+    return _client
+
+
+async def close_api_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,5 +1,5 @@
 from nicegui import ui, app
-import httpx
+from app.ui.api import api_client
 
 
 def create_meeting_model(slots, professor_name):
@@ -53,13 +53,13 @@ async def book_meeting(slot_id: int, meeting_purpose: str, dialog):
     }
     try:
         token = await ui.run_javascript("localStorage.getItem('token');")
-        backend_url = "http://127.0.0.1:8000/api/auth/book_slot"
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                backend_url,
-                json=meeting_data,
-                headers={"Authorization": f"Bearer {token}"}
-            )
+        backend_url = "/api/auth/book_slot"
+        client = api_client()
+        response = await client.post(
+            backend_url,
+            json=meeting_data,
+            headers={"Authorization": f"Bearer {token}"}
+        )
 
         if response.status_code == 200:
             ui.notify("🎉 Meeting booked successfully!", type="positive")
@@ -73,13 +73,13 @@ async def book_meeting(slot_id: int, meeting_purpose: str, dialog):
 async def join_waitlist(slot_id: int, dialog):
     try:
         token = await ui.run_javascript("localStorage.getItem('token');")
-        backend_url = "http://127.0.0.1:8000/api/auth/add_to_waitlist"
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                backend_url,
-                json={"slot_id": slot_id},
-                headers={"Authorization": f"Bearer {token}"}
-            )
+        backend_url = "/api/auth/add_to_waitlist"
+        client = api_client()
+        response = await client.post(
+            backend_url,
+            json={"slot_id": slot_id},
+            headers={"Authorization": f"Bearer {token}"}
+        )
 
         if response.status_code == 200:
             ui.notify("📌 You have joined the waitlist!", type="positive")
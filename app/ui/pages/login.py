@@ -1,6 +1,6 @@
 from nicegui import ui, app
 from fastapi.staticfiles import StaticFiles
-import httpx
+from app.ui.api import api_client
 import os
 
 # Debug: print current working directory.
@@ -144,9 +144,9 @@ def login_page():
                     # Proceed with backend login.
                     user_data = {"email": email.value, "password": password_input.value}
                     try:
-                        backend_url = "http://127.0.0.1:8000/api/auth/login"
-                        async with httpx.AsyncClient() as client:
-                            response = await client.post(backend_url, json=user_data)
+                        backend_url = "/api/auth/login"
+                        client = api_client()
+                        response = await client.post(backend_url, json=user_data)
                         if response.status_code == 200:
                             data = response.json()
                             token = data.get("access_token")
@@ -1,6 +1,6 @@
 # app/ui/pages/meetings.py
 from nicegui import ui
-import httpx
+from app.ui.api import api_client
 
 async def get_meetings():
     """
@@ -8,12 +8,12 @@ async def get_meetings():
     """
     try:
         token = await ui.run_javascript("localStorage.getItem('token');")
-        backend_url = "http://127.0.0.1:8000/api/auth/student/meetings"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                backend_url,
-                headers={"Authorization": f"Bearer {token}"}
-            )
+        backend_url = "/api/auth/student/meetings"
+        client = api_client()
+        response = await client.get(
+            backend_url,
+            headers={"Authorization": f"Bearer {token}"}
+        )
 
         if response.status_code == 200:
             return response.json()  # List of meetings
@@ -90,13 +90,13 @@ async def confirm_delete(meeting_id, container, dialog):
     """
     try:
         token = await ui.run_javascript("localStorage.getItem('token');")
-        backend_url = f"http://127.0.0.1:8000/api/auth/student/meetings/{meeting_id}"
+        backend_url = f"/api/auth/student/meetings/{meeting_id}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                backend_url,
-                headers={"Authorization": f"Bearer {token}"}
-            )
+        client = api_client()
+        response = await client.delete(
+            backend_url,
+            headers={"Authorization": f"Bearer {token}"}
+        )
 
         if response.status_code == 200:
             ui.notify("✅ Meeting deleted", type="positive")
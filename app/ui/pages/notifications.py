@@ -1,32 +1,32 @@
-from nicegui import ui
-import httpx
+import asyncio
+
+from nicegui import Client, background_tasks, ui
+
+from app.auth.notification_hub import notification_hub
+from app.ui.api import api_client
+
+# How many of the newest notifications the menu loads
+NOTIFICATION_MENU_LIMIT = 50
 
-async def fetch_unread_count():
-    """Fetch the count of unread notifications from FastAPI."""
-    user_id = await ui.run_javascript("localStorage.getItem('user_id');")
-    if not user_id:
-        return 0  # No user, no notifications
 
-    backend_url = f"http://127.0.0.1:8000/api/auth/unread_count?user_id={user_id}"
+async def fetch_unread_count(user_id):
+    """Fetch the count of unread notifications from FastAPI."""
+    backend_url = f"/api/auth/unread_count?user_id={user_id}"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(backend_url)
+    client = api_client()
+    response = await client.get(backend_url)
 
     if response.status_code == 200:
         return response.json().get("unread_count", 0)  # Get count or return 0
     return 0
 
 
-async def fetch_notifications():
-    """Fetch unread notifications from FastAPI."""
-    user_id = await ui.run_javascript("localStorage.getItem('user_id');")
-    if not user_id:
-        return []
-
-    backend_url = f"http://127.0.0.1:8000/api/auth/notifications?user_id={user_id}"
+async def fetch_notifications(user_id, limit=NOTIFICATION_MENU_LIMIT):
+    """Fetch the user's newest notifications from FastAPI."""
+    backend_url = f"/api/auth/notifications?user_id={user_id}&limit={limit}"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(backend_url)
+    client = api_client()
+    response = await client.get(backend_url)
 
     if response.status_code == 200:
         data = response.json()
@@ -46,16 +46,16 @@ async def respond_to_reschedule(notification_id, response_action):
         ui.notify("❌ No token found in localStorage. Please log in.", type="negative")
         return
 
-    backend_url = f"http://127.0.0.1:8000/api/auth/reschedule_requests/{notification_id}/{response_action}"
+    backend_url = f"/api/auth/reschedule_requests/{notification_id}/{response_action}"
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            backend_url,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {token}"
-            }
-        )
+    client = api_client()
+    response = await client.post(
+        backend_url,
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}"
+        }
+    )
 
     if response.status_code == 200:
         ui.notify(f"✅ {response.json()['message']}", type="positive")
@@ -63,61 +63,149 @@ async def respond_to_reschedule(notification_id, response_action):
         ui.notify(f"❌ Error: {response.text}", type="negative")
 
 
-async def mark_notification_as_read(notification_id):
-    """Mark a notification as read in FastAPI."""
-    backend_url = "http://127.0.0.1:8000/api/auth/notifications/mark_as_read"
-    async with httpx.AsyncClient() as client:
-        await client.post(backend_url, json={"notification_id": notification_id})
-
-
-async def load_notifications(menu):
-    """Loads notifications into the menu with updated design."""
-    notifications = await fetch_notifications()
-    menu.clear()
-
-    with menu:
-        ui.label("🔔 Notifications").classes("font-bold text-lg mb-2")
-        ui.separator().style("margin-bottom: 8px;")
-
-        if notifications:
-            for notification in notifications:
-                with ui.card().style("""
-                    background: rgba(255, 255, 255, 0.9);
-                    backdrop-filter: blur(10px);
-                    border-radius: 12px;
-                    box-shadow: 0px 4px 12px rgba(0, 0, 0, 0.1);
-                    padding: 12px;
-                    margin-bottom: 8px;
-                """):
-                    ui.label(notification["message"]).classes("text-md font-semibold text-gray-800")
-
-                    with ui.row().classes("justify-between mt-2"):
-                        ui.button("✅ Accept", on_click=lambda n=notification["reschedule_id"]: respond_to_reschedule(n, "accept"))\
-                            .style("""
-                                background: linear-gradient(to right, #10b981, #22c55e);
-                                color: black;
-                                padding: 8px 12px;
-                                border-radius: 8px;
-                                font-weight: bold;
-                                transition: all 0.3s ease-in-out;
-                            """)\
-                            .on("mouseenter", lambda e: e.sender.set_style("background: linear-gradient(to right, #059669, #16a34a);"))\
-                            .on("mouseleave", lambda e: e.sender.set_style("background: linear-gradient(to right, #10b981, #22c55e);"))
-
-                        ui.button("❌ Reject", on_click=lambda n=notification["reschedule_id"]: respond_to_reschedule(n, "reject"))\
-                            .style("""
-                                background: linear-gradient(to right, #ef4444, #dc2626);
-                                color: black;
-                                padding: 8px 12px;
-                                border-radius: 8px;
-                                font-weight: bold;
-                                transition: all 0.3s ease-in-out;
-                            """)\
-                            .on("mouseenter", lambda e: e.sender.set_style("background: linear-gradient(to right, #b91c1c, #991b1b);"))\
-                            .on("mouseleave", lambda e: e.sender.set_style("background: linear-gradient(to right, #ef4444, #dc2626);"))
-
-        else:
-            ui.label("✅ No new notifications").classes("text-gray-500 text-sm")
+async def mark_notifications_read(notification_ids):
+    """Mark the logged-in user's notifications as read; the hub pushes the "read" event back."""
+    if not notification_ids:
+        return
+    token = await ui.run_javascript("localStorage.getItem('token');")
+    if not token:
+        return
+
+    client = api_client()
+    response = await client.post(
+        "/api/auth/notifications/mark_read",
+        json={"ids": list(notification_ids)},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    if response.status_code != 200:
+        ui.notify(f"❌ Error: {response.text}", type="negative")
+
+
+def notification_card(notification):
+    """One notification, with Accept / Reject buttons when it asks to approve a reschedule."""
+    with ui.card().style("""
+        background: rgba(255, 255, 255, 0.9);
+        backdrop-filter: blur(10px);
+        border-radius: 12px;
+        box-shadow: 0px 4px 12px rgba(0, 0, 0, 0.1);
+        padding: 12px;
+        margin-bottom: 8px;
+    """) as card:
+        ui.label(notification["message"]).classes("text-md font-semibold text-gray-800")
+
+        if notification["reschedule_id"] is not None:
+            with ui.row().classes("justify-between mt-2"):
+                ui.button("✅ Accept", on_click=lambda n=notification["reschedule_id"]: respond_to_reschedule(n, "accept"))\
+                    .style("""
+                        background: linear-gradient(to right, #10b981, #22c55e);
+                        color: black;
+                        padding: 8px 12px;
+                        border-radius: 8px;
+                        font-weight: bold;
+                        transition: all 0.3s ease-in-out;
+                    """)\
+                    .on("mouseenter", lambda e: e.sender.set_style("background: linear-gradient(to right, #059669, #16a34a);"))\
+                    .on("mouseleave", lambda e: e.sender.set_style("background: linear-gradient(to right, #10b981, #22c55e);"))
+
+                ui.button("❌ Reject", on_click=lambda n=notification["reschedule_id"]: respond_to_reschedule(n, "reject"))\
+                    .style("""
+                        background: linear-gradient(to right, #ef4444, #dc2626);
+                        color: black;
+                        padding: 8px 12px;
+                        border-radius: 8px;
+                        font-weight: bold;
+                        transition: all 0.3s ease-in-out;
+                    """)\
+                    .on("mouseenter", lambda e: e.sender.set_style("background: linear-gradient(to right, #b91c1c, #991b1b);"))\
+                    .on("mouseleave", lambda e: e.sender.set_style("background: linear-gradient(to right, #ef4444, #dc2626);"))
+
+    if notification["is_read"]:
+        card.style("opacity: 0.6;")
+    return card
+
+
+class NotificationMenu:
+    """
+    The notification menu of one open dashboard. Loaded once, then kept current
+    by the events the notification hub pushes for this user (no polling).
+    """
+
+    def __init__(self, menu, badge):
+        self.cards = {}     # { notification_id: card }
+        self.unread = set()
+        self.badge = badge
+        # Opening the menu reads everything in it
+        menu.on("show", lambda: mark_notifications_read(sorted(self.unread)))
+        with menu:
+            ui.label("🔔 Notifications").classes("font-bold text-lg mb-2")
+            ui.separator().style("margin-bottom: 8px;")
+            self.empty_label = ui.label("✅ No new notifications").classes("text-gray-500 text-sm")
+            self.container = ui.column().classes("w-full gap-0")
+
+    def add(self, notification):
+        if notification["id"] in self.cards:
+            return
+        with self.container:
+            card = notification_card(notification)
+        card.move(self.container, target_index=0)  # newest first
+        # ...and so does clicking one that arrived while it was open
+        card.on("click", lambda n=notification["id"]: mark_notifications_read([n] if n in self.unread else []))
+        if not notification["is_read"]:
+            self.unread.add(notification["id"])
+        self.cards[notification["id"]] = card
+        self.empty_label.set_visibility(False)
+
+    def mark_read(self, notification_id):
+        self.unread.discard(notification_id)
+        card = self.cards.get(notification_id)
+        if card is not None:
+            card.style("opacity: 0.6;")
+
+    def remove(self, notification_id):
+        self.unread.discard(notification_id)
+        card = self.cards.pop(notification_id, None)
+        if card is not None:
+            self.container.remove(card)
+        self.empty_label.set_visibility(not self.cards)
+
+    def set_unread_count(self, count):
+        self.badge.set_text(str(count))
+        self.badge.set_visibility(count > 0)
+
+    def apply(self, event):
+        if event["type"] == "created":
+            self.add(event["notification"])
+        elif event["type"] == "read":
+            for notification_id in event["ids"]:
+                self.mark_read(notification_id)
+        elif event["type"] == "deleted":
+            for notification_id in event["ids"]:
+                self.remove(notification_id)
+        # Events carry the absolute count, so applying one twice is harmless
+        if event.get("unread_count") is not None:
+            self.set_unread_count(event["unread_count"])
+
+    async def listen(self, client):
+        """Initial load, then apply pushed deltas until the page is gone."""
+        await client.connected()
+        user_id = await client.run_javascript("localStorage.getItem('user_id');")
+        if not user_id:
+            return
+
+        # Subscribe before loading so nothing committed in between is missed
+        subscription = notification_hub.subscribe(int(user_id))
+        try:
+            self.set_unread_count(await fetch_unread_count(user_id))
+            for notification in reversed(await fetch_notifications(user_id)):
+                self.add(notification)
+            while client.id in Client.instances:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=30)
+                except asyncio.TimeoutError:
+                    continue
+                self.apply(event)
+        finally:
+            subscription.close()
 
 
 def notification_button():
@@ -127,7 +215,9 @@ def notification_button():
             .props('flat color=transparent text-color=white')\
             .classes("w-full text-left custom-btn rounded-lg")\
             .style("width: 100%; border: 1px solid #ffffff;"):
-            
+            badge = ui.badge("0", color="red").props("floating")
+            badge.set_visibility(False)
+
             with ui.menu().props('auto-close').style("""
                 background: rgba(255, 255, 255, 0.95);
                 backdrop-filter: blur(10px);
@@ -135,4 +225,5 @@ def notification_button():
                 padding: 12px;
                 box-shadow: 0px 6px 14px rgba(0, 0, 0, 0.2);
             """) as menu:
-                ui.timer(2, lambda: load_notifications(menu))
+                notification_menu = NotificationMenu(menu, badge)
+    background_tasks.create(notification_menu.listen(ui.context.client), name="notification_menu")
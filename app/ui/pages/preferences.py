@@ -1,6 +1,6 @@
 # preferences.py
 from nicegui import ui
-import httpx
+from app.ui.api import api_client
 
 def preferences_dialog():
     dialog = ui.dialog()
@@ -40,10 +40,10 @@ def preferences_dialog():
             ui.notify("No user or token found. Please log in.", type="warning")
             return
 
-        backend_url = f"http://127.0.0.1:8000/api/auth/users/{user_id}/preferences"
+        backend_url = f"/api/auth/users/{user_id}/preferences"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(backend_url, headers={"Authorization": f"Bearer {token}"})
+            client = api_client()
+            response = await client.get(backend_url, headers={"Authorization": f"Bearer {token}"})
             if response.status_code == 200:
                 data = response.json()
                 if isinstance(data, dict) and "preferred_times" in data:
@@ -80,9 +80,9 @@ def preferences_dialog():
     async def delete_preference(pref_id, container):
         token = await ui.run_javascript("localStorage.getItem('token')")
         user_id = await ui.run_javascript("localStorage.getItem('user_id')")
-        url = f"http://127.0.0.1:8000/api/auth/users/{user_id}/preferences/{pref_id}"
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(url, headers={"Authorization": f"Bearer {token}"})
+        url = f"/api/auth/users/{user_id}/preferences/{pref_id}"
+        client = api_client()
+        response = await client.delete(url, headers={"Authorization": f"Bearer {token}"})
         if response.status_code == 200:
             ui.notify("✅ Preference deleted", type="positive")
             container.clear()
@@ -103,14 +103,14 @@ def preferences_dialog():
             ui.notify("No user or token found. Please log in.", type="warning")
             return
 
-        backend_url = f"http://127.0.0.1:8000/api/auth/users/{user_id}/preferences"
+        backend_url = f"/api/auth/users/{user_id}/preferences"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    backend_url,
-                    json={"time_slots": [raw_value]},  # Correct key matching FastAPI.
-                    headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-                )
+            client = api_client()
+            response = await client.post(
+                backend_url,
+                json={"time_slots": [raw_value]},  # Correct key matching FastAPI.
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+            )
 
             if response.status_code == 200:
                 ui.notify("Preferred time added!", type="positive")
@@ -1,6 +1,6 @@
 from nicegui import ui, app
 from fastapi.staticfiles import StaticFiles
-import httpx
+from app.ui.api import api_client
 import os
 
 # Debug: print current working directory.
@@ -113,8 +113,8 @@ def signup_page():
                         "password": password_input.value
                     }
                     try:
-                        async with httpx.AsyncClient() as client:
-                            response = await client.post("http://127.0.0.1:8000/api/auth/signup", json=user_data)
+                        client = api_client()
+                        response = await client.post("/api/auth/signup", json=user_data)
                         if response.status_code == 200:
                             ui.notify("Signed up successfully!", type="positive")
                         else:
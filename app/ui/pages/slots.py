@@ -1,7 +1,11 @@
 # app/ui/pages/slots.py
 
+from datetime import date as date_type
+
 from nicegui import ui
-import httpx
+from app.ui.api import api_client
+
+WEEKDAYS = {0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu", 4: "Fri", 5: "Sat", 6: "Sun"}
 
 def create_slot_modal(date: str):
     """
@@ -24,11 +28,36 @@ def create_slot_modal(date: str):
             start_time = ui.input("Start Time (HH:MM)").props("type=time").classes("w-full mt-3")
             end_time   = ui.input("End Time (HH:MM)").props("type=time").classes("w-full mt-2")
 
+            # 🔁 Weekly office hours: the server cuts start–end into slots on every chosen day
+            repeat = ui.checkbox("🔁 Repeat weekly (office hours)").classes("mt-2")
+            with ui.column().classes("w-full").bind_visibility_from(repeat, "value"):
+                weekdays = ui.select(
+                    WEEKDAYS, multiple=True, label="Days",
+                    value=[date_type.fromisoformat(date).weekday()],
+                ).classes("w-full")
+                until = ui.input("Until").props("type=date").classes("w-full")
+                slot_minutes = ui.select([10, 15, 20, 30, 45, 60], value=15, label="Slot length (minutes)")\
+                    .classes("w-full")
+
             async def on_create():
                 if not start_time.value or not end_time.value:
                     ui.notify("⚠ Please fill both start and end times", type="warning")
                     return
-                await create_slot(date, start_time.value, end_time.value, dialog)
+                if not repeat.value:
+                    await create_slot(date, start_time.value, end_time.value, dialog)
+                    return
+                if not weekdays.value or not until.value:
+                    ui.notify("⚠ Please choose the days and an end date", type="warning")
+                    return
+                await create_recurring_slots({
+                    "weekdays": weekdays.value,
+                    "start_date": date,
+                    "until": until.value,
+                    "day_start": start_time.value,
+                    "day_end": end_time.value,
+                    "slot_minutes": slot_minutes.value,
+                    "skip_conflicts": True,
+                }, dialog)
 
             with ui.row().classes("justify-between mt-5 w-full"):
                 ui.button("Cancel", on_click=dialog.close)\
@@ -46,12 +75,12 @@ async def create_slot(date: str, start: str, end: str, dialog):
     slot_data = {"start": f"{date}T{start}", "end": f"{date}T{end}"}
     try:
         token = await ui.run_javascript("localStorage.getItem('token');")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://127.0.0.1:8000/api/auth/create_slot",
-                json=slot_data,
-                headers={"Authorization": f"Bearer {token}"}
-            )
+        client = api_client()
+        response = await client.post(
+            "/api/auth/create_slot",
+            json=slot_data,
+            headers={"Authorization": f"Bearer {token}"}
+        )
         if response.status_code == 200:
             ui.notify("✅ Slot created successfully!", type="positive")
             dialog.close()
@@ -59,4 +88,29 @@ async def create_slot(date: str, start: str, end: str, dialog):
         else:
             ui.notify(f"❌ {response.json().get('detail', 'Failed to create slot')}", type="negative")
     except Exception as e:
-        ui.notify(f"⚠ Error: {e}", type="negative")
\ No newline at end of file
+        ui.notify(f"⚠ Error: {e}", type="negative")
+
+async def create_recurring_slots(rule: dict, dialog):
+    """
+    Sends a weekly office-hours rule to the backend, which creates all its slots at once.
+    """
+    try:
+        token = await ui.run_javascript("localStorage.getItem('token');")
+        client = api_client()
+        response = await client.post(
+            "/api/auth/create_slots/recurring",
+            json=rule,
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code == 200:
+            result = response.json()
+            message = f"✅ {result['created']} slots created!"
+            if result["skipped"]:
+                message += f" ({result['skipped']} skipped, they overlap existing slots)"
+            ui.notify(message, type="positive")
+            dialog.close()
+            ui.run_javascript("window.calendar.refetchEvents();")
+        else:
+            ui.notify(f"❌ {response.json().get('detail', 'Failed to create slots')}", type="negative")
+    except Exception as e:
+        ui.notify(f"⚠ Error: {e}", type="negative")
@@ -0,0 +1,68 @@
+"""
+Per-request authentication cost of a protected route: the previous path
+(verify_token decoding the JWT, then get_logged_in_user decoding it again and
+selecting the user) vs. the cached principal, plus the SQL statements
+/api/auth/calendar issues per request.
+
+    python -m benchmarks.bench_auth_principal [requests]
+"""
+import sys
+import time
+
+from benchmarks.common import QueryCounter, bearer_headers, use_temp_app_database
+
+
+def per_call_us(fn, repeat):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1_000_000
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    use_temp_app_database()
+
+    import jwt
+    from fastapi.testclient import TestClient
+    from starlette.requests import Request
+
+    from app.auth.models import User
+    from app.auth.principals import ALGORITHM, SECRET_KEY, principal_cache
+    from app.auth.routes import get_logged_in_user
+    from app.auth.utils import verify_token
+    from app.db import SessionLocal, engine
+    from app.main import app
+
+    with SessionLocal() as db:
+        db.add(User(name="student", email="student@example.com", password="x", role="student"))
+        db.commit()
+
+    headers = bearer_headers(1, "student")
+    token = headers["Authorization"][len("Bearer "):]
+    request = Request({"type": "http", "headers": [(b"authorization", headers["Authorization"].encode())]})
+
+    def previous(db):
+        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])               # verify_token
+        user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+        return db.query(User).filter(User.id == user_id).first()            # get_logged_in_user
+
+    def cached(db):
+        verify_token(token)
+        return get_logged_in_user(request, db)
+
+    with SessionLocal() as db:
+        print(f"auth per request, {repeat} requests:")
+        print(f"  decode x2 + SELECT users (old) {per_call_us(lambda: previous(db), repeat):8.1f} us")
+        print(f"  cached principal               {per_call_us(lambda: cached(db), repeat):8.1f} us  "
+              f"(cache {principal_cache.stats()})")
+
+    with TestClient(app) as client, QueryCounter(engine) as queries:
+        for _ in range(100):
+            client.get("/api/auth/calendar", headers=headers).raise_for_status()
+    print(f"GET /api/auth/calendar: {queries.count / 100:.1f} SQL statements per request")
+
+
+if __name__ == "__main__":
+    main()
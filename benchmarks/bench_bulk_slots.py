@@ -0,0 +1,87 @@
+"""
+A semester of 15-minute office hours (Mon/Wed/Thu 09:00-13:00 for 16 weeks)
+created one /create_slot call at a time vs. one /create_slots/recurring call,
+plus the overlap check on its own: SlotIntervalIndex vs. comparing every new
+slot with every existing one.
+
+    python -m benchmarks.bench_bulk_slots [weeks] [existing_slots]
+"""
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import bearer_headers, use_temp_app_database
+
+FIRST_DAY = date(2030, 2, 4)     # a Monday
+
+
+def main():
+    weeks = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    existing_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    use_temp_app_database()
+
+    from fastapi.testclient import TestClient
+
+    from app.auth.models import User
+    from app.auth.slot_recurrence import SlotIntervalIndex, expand_weekly
+    from app.db import SessionLocal
+    from app.main import app
+
+    with SessionLocal() as db:
+        db.add_all([
+            User(name=f"prof {i}", email=f"prof{i}@example.com", password="x", role="professor")
+            for i in (1, 2)
+        ])
+        db.commit()
+
+    rule = {
+        "weekdays": [0, 2, 3],
+        "start_date": FIRST_DAY.isoformat(),
+        "until": (FIRST_DAY + timedelta(weeks=weeks) - timedelta(days=1)).isoformat(),
+        "day_start": "09:00",
+        "day_end": "13:00",
+        "slot_minutes": 15,
+    }
+    slots = expand_weekly(rule["weekdays"], FIRST_DAY, date.fromisoformat(rule["until"]),
+                          datetime.strptime("09:00", "%H:%M").time(),
+                          datetime.strptime("13:00", "%H:%M").time(), 15)
+
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        for start, end in slots:
+            response = client.post("/api/auth/create_slot", headers=bearer_headers(1, "professor"),
+                                   json={"start": start.isoformat(), "end": end.isoformat()})
+            response.raise_for_status()
+        one_by_one = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post("/api/auth/create_slots/recurring", headers=bearer_headers(2, "professor"), json=rule)
+        response.raise_for_status()
+        bulk = time.perf_counter() - started
+
+    print(f"{len(slots)} slots ({weeks} weeks of office hours):")
+    print(f"  /create_slot x {len(slots):<6} {one_by_one * 1000:9.1f} ms")
+    print(f"  /create_slots/recurring   {bulk * 1000:9.1f} ms  ({response.json()['created']} created)")
+
+    # Overlap check alone, against a professor with many existing slots
+    existing = [
+        (datetime(2029, 10, 1) + timedelta(minutes=20 * i), datetime(2029, 10, 1) + timedelta(minutes=20 * i + 15))
+        for i in range(existing_count)
+    ]
+    started = time.perf_counter()
+    index = SlotIntervalIndex(existing)
+    indexed = sum(index.overlaps(start, end) for start, end in slots)
+    indexed_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    pairwise = sum(any(s < end and start < e for s, e in existing) for start, end in slots)
+    pairwise_ms = (time.perf_counter() - started) * 1000
+    assert indexed == pairwise
+
+    print(f"overlap check against {existing_count} existing slots ({indexed} overlapping):")
+    print(f"  pairwise                  {pairwise_ms:9.1f} ms")
+    print(f"  SlotIntervalIndex         {indexed_ms:9.1f} ms  (incl. building it)")
+
+
+if __name__ == "__main__":
+    main()
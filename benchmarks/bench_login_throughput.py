@@ -0,0 +1,113 @@
+"""
+Login storm: C clients logging in as fast as they can against a real uvicorn
+server for a few seconds, while one client keeps calling a cheap protected
+route (/api/auth/calendar) to show whether the storm starves other endpoints.
+Reports logins/s, 503 refusals and the probe's latency.
+
+PASSWORD_WORKERS (default: all cores here) sets the bcrypt pool size; use
+--app-dir to run the same storm against another checkout:
+
+    python -m benchmarks.bench_login_throughput --clients 64 --seconds 10 --cores 4
+    python -m benchmarks.bench_login_throughput --app-dir /path/to/other/checkout
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import percentile
+from benchmarks.load_test import REPO_ROOT, start_server, wait_until_up
+
+
+def seed(users):
+    from passlib.context import CryptContext
+    from sqlalchemy import insert
+
+    from app.auth.models import User
+    from app.auth.passwords import BCRYPT_ROUNDS
+    from app.db import SessionLocal
+
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS).hash("pw")
+    with SessionLocal() as db:
+        db.execute(insert(User), [
+            {"name": f"student {i}", "email": f"student{i}@example.com", "password": hashed, "role": "student"}
+            for i in range(users)
+        ])
+        db.commit()
+
+
+async def storm(base_url, clients, users, seconds):
+    from benchmarks.common import bearer_headers
+
+    statuses = Counter()
+    probe_ms = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def login_loop(worker_id):
+            i = worker_id
+            while time.perf_counter() < deadline:
+                response = await client.post("/api/auth/login", json={
+                    "email": f"student{i % users}@example.com", "password": "pw",
+                })
+                statuses[response.status_code] += 1
+                if response.status_code == 503:
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                i += clients
+
+        async def probe():
+            headers = bearer_headers(1, "student")
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                (await client.get("/api/auth/calendar", headers=headers)).raise_for_status()
+                probe_ms.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(login_loop(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+    return statuses, probe_ms, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=REPO_ROOT)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="PASSWORD_WORKERS")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="meetly-login-")
+    database_url = f"sqlite:///{tmpdir}/meetly.db"
+    os.environ.update(DATABASE_URL=database_url, SECRET_KEY=os.environ.get("SECRET_KEY", "load-test"),
+                      ALGORITHM=os.environ.get("ALGORITHM", "HS256"), PASSWORD_WORKERS=str(args.cores))
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    seed(args.users)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    log_path = os.path.join(tmpdir, "server.log")
+    with open(log_path, "w") as log_file:
+        server = start_server(os.path.abspath(args.app_dir), args.port, database_url, log_file)
+        try:
+            asyncio.run(wait_until_up(base_url))
+            statuses, probe_ms, elapsed = asyncio.run(storm(base_url, args.clients, args.users, args.seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"app dir: {args.app_dir}, {args.clients} clients for {elapsed:.1f}s, "
+          f"{args.cores} password worker(s) (server log: {log_path})")
+    print(f"logins: {statuses[200] / elapsed:.1f}/s, responses {dict(statuses)}")
+    print(f"/calendar probe while storming: p50 {percentile(probe_ms, 50):.0f} ms  "
+          f"p99 {percentile(probe_ms, 99):.0f} ms  ({len(probe_ms)} calls)")
+
+
+if __name__ == "__main__":
+    main()
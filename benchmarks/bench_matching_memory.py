@@ -0,0 +1,58 @@
+"""
+Memory of the matching graph as build_matching_graph's dicts vs. as a
+CSRGraph (default: 200k students x 100k slots, 1M preference edges), and the
+cost of converting between them (times include tracemalloc overhead).
+
+    python -m benchmarks.bench_matching_memory [--students 200000] [--slots 100000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.common import use_temp_app_database
+
+
+def traced(build):
+    """
+    (result, bytes still allocated by build, peak bytes during build, seconds)
+    """
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=200_000)
+    parser.add_argument("--slots", type=int, default=100_000)
+    args = parser.parse_args()
+    use_temp_app_database()
+
+    from app.auth.csr_graph import CSRGraph
+    from benchmarks.bench_matching_engines import synthetic_graph
+
+    (user_to_slots, slot_to_user), dict_bytes, _, dict_s = traced(
+        lambda: synthetic_graph(args.students, args.slots)
+    )
+    graph, csr_bytes, csr_peak, csr_s = traced(lambda: CSRGraph.from_dicts(user_to_slots, slot_to_user))
+    edges = len(graph.targets)
+    print(f"{args.students} students, {args.slots} slots, {edges} preference edges")
+    print(f"  {'dicts':<24} {dict_bytes / 2**20:8.1f} MiB   {dict_bytes / edges:6.1f} B/edge")
+    print(f"  {'CSRGraph':<24} {csr_bytes / 2**20:8.1f} MiB   {csr_bytes / edges:6.1f} B/edge   "
+          f"built in {csr_s:.2f} s (peak {csr_peak / 2**20:.1f} MiB)")
+    print(f"  {'  of which arrays':<24} {graph.nbytes() / 2**20:8.1f} MiB   {graph.nbytes() / edges:6.1f} B/edge")
+
+    views, view_bytes, _, _ = traced(lambda: (graph.user_to_slots, graph.slot_to_user))
+    print(f"  {'dict API views':<24} {view_bytes:8d} B")
+    _, copy_bytes, _, copy_s = traced(graph.to_dicts)
+    print(f"  {'to_dicts() copy':<24} {copy_bytes / 2**20:8.1f} MiB   in {copy_s:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
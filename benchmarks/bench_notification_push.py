@@ -0,0 +1,75 @@
+"""
+Notification delivery through the in-process hub: N open dashboards
+(subscriptions) on the event loop, notifications published from worker
+threads the way sync routes do, reporting publish-to-delivery latency.
+
+For comparison, the old 2-second polling timer cost N / 2 requests per second
+(each a full /notifications query) whether anything changed or not, and
+delivered a notification after 1 s on average.
+
+    python -m benchmarks.bench_notification_push [dashboards] [notifications] [per_second]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.auth.notification_hub import NotificationHub
+from benchmarks.common import percentile
+
+PUBLISHER_THREADS = 8
+
+
+async def run(dashboards, notifications, rate):
+    hub = NotificationHub()
+    latencies = []
+    done = asyncio.Event()
+
+    async def dashboard(user_id):
+        subscription = hub.subscribe(user_id)
+        try:
+            while True:
+                event = await subscription.get()
+                latencies.append(time.perf_counter() - event["sent"])
+                if len(latencies) == notifications:
+                    done.set()
+        finally:
+            subscription.close()
+
+    tasks = [asyncio.create_task(dashboard(user_id)) for user_id in range(dashboards)]
+    await asyncio.sleep(0)
+
+    def publisher(first):
+        # Each thread publishes every PUBLISHER_THREADS-th notification at its share of the rate
+        interval = PUBLISHER_THREADS / rate
+        next_at = time.perf_counter()
+        for i in range(first, notifications, PUBLISHER_THREADS):
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+            hub.publish(i % dashboards, {"type": "created", "sent": time.perf_counter()})
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=PUBLISHER_THREADS) as pool:
+        await asyncio.gather(*(loop.run_in_executor(pool, publisher, i) for i in range(PUBLISHER_THREADS)))
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    for task in tasks:
+        task.cancel()
+    return latencies, elapsed
+
+
+def main():
+    dashboards = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    notifications = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 2_000
+    latencies, elapsed = asyncio.run(run(dashboards, notifications, rate))
+    ms = [latency * 1000 for latency in latencies]
+    print(f"{dashboards} dashboards, {notifications} notifications at {rate:.0f}/s in {elapsed:.2f}s")
+    print(f"push:    0 idle req/s, delivery ms p50 {percentile(ms, 50):.2f}  p99 {percentile(ms, 99):.2f}")
+    print(f"polling: {dashboards / 2:.0f} idle req/s, delivery ms ~1000 avg (2 s timer)")
+
+
+if __name__ == "__main__":
+    main()
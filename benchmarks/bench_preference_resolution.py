@@ -0,0 +1,76 @@
+"""
+Query count and runtime of build_matching_graph as preferences grow.
+
+The legacy resolver issued one SlotTime lookup per PreferredTime row; the
+current one resolves every preference with a single join on the indexed
+slot_times.start_time, so its query count stays constant.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.auth.models import PreferredTime, SlotTime, User
+from app.auth.utils import build_matching_graph
+from benchmarks.common import QueryCounter, temp_database, timer
+
+PREFERENCE_COUNTS = [1_000, 10_000, 100_000]
+LEGACY_LIMIT = 10_000  # the N+1 version gets too slow to be worth waiting for
+SLOT_COUNT = 2_000
+STUDENT_COUNT = 5_000
+
+
+def legacy_preference_lookup(db):
+    user_to_slots = {}
+    for pref in db.query(PreferredTime).all():
+        slots = user_to_slots.setdefault(pref.user_id, [])
+        matching_slot = db.query(SlotTime).filter(SlotTime.start_time == pref.time_slot).first()
+        if matching_slot and matching_slot.id not in slots:
+            slots.append(matching_slot.id)
+    return user_to_slots
+
+
+def seed(Session, preference_count):
+    rng = random.Random(42)
+    base = datetime(2030, 1, 7, 8, 0)
+    starts = [base + timedelta(minutes=30 * (i % 400)) for i in range(SLOT_COUNT)]
+    with Session() as db:
+        db.execute(insert(User), [
+            {"id": 1, "name": "prof", "email": "prof@bench", "password": "x", "role": "professor"}
+        ] + [
+            {"id": i + 2, "name": f"s{i}", "email": f"s{i}@bench", "password": "x", "role": "student"}
+            for i in range(STUDENT_COUNT)
+        ])
+        db.execute(insert(SlotTime), [
+            {"professor_id": 1, "start_time": s, "end_time": s + timedelta(minutes=30), "is_booked": False}
+            for s in starts
+        ])
+        db.execute(insert(PreferredTime), [
+            {"user_id": rng.randrange(STUDENT_COUNT) + 2, "time_slot": rng.choice(starts)}
+            for _ in range(preference_count)
+        ])
+        db.commit()
+
+
+def main():
+    print(f"{'prefs':>8} {'queries':>8} {'seconds':>8} {'legacy q':>9} {'legacy s':>9}")
+    for preference_count in PREFERENCE_COUNTS:
+        with temp_database() as (engine, Session):
+            seed(Session, preference_count)
+            results = {}
+            with Session() as db, QueryCounter(engine) as counter, timer(results, "current"):
+                build_matching_graph(db)
+            queries = counter.count
+
+            legacy_queries, legacy_seconds = "-", "-"
+            if preference_count <= LEGACY_LIMIT:
+                with Session() as db, QueryCounter(engine) as legacy, timer(results, "legacy"):
+                    legacy_preference_lookup(db)
+                legacy_queries, legacy_seconds = legacy.count, f"{results['legacy']:.2f}"
+
+            print(f"{preference_count:>8} {queries:>8} {results['current']:>8.2f} "
+                  f"{legacy_queries:>9} {legacy_seconds:>9}")
+
+
+if __name__ == "__main__":
+    main()
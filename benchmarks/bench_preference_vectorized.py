@@ -0,0 +1,105 @@
+"""
+Resolving preferences to slot start times at scale (default: 1M preferences
+x 200k slots): a dict of start times, as the matching index does, and a
+bisect per preference for +-N minute windows, vs. one NumPy searchsorted
+pass over all preferences. Needs NumPy (installed with matplotlib); the app
+itself keeps exact-match dict lookups.
+
+    python -m benchmarks.bench_preference_vectorized [--preferences 1000000] [--slots 200000]
+        [--tolerance-minutes 15]
+"""
+import argparse
+import random
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+BASE = datetime(2030, 1, 7, 8)
+
+
+def resolve_preferences(preferred_times, slot_starts, tolerance_seconds=0):
+    """
+    Match every preference against the sorted slot start times with one
+    searchsorted over all of them (both int64 epoch seconds). Preference i
+    gets the slots whose start is within `tolerance_seconds` of preferred_times[i].
+
+    Returns (preference, position) arrays with one entry per match, grouped
+    by preference, positions into slot_starts in ascending order.
+    """
+    import numpy as np
+
+    low = np.searchsorted(slot_starts, preferred_times - tolerance_seconds, side="left")
+    high = np.searchsorted(slot_starts, preferred_times + tolerance_seconds, side="right")
+    counts = high - low
+    preference = np.repeat(np.arange(len(preferred_times)), counts)
+    # Position = the preference's first slot + the match's offset within its group
+    group_start = np.cumsum(counts) - counts
+    position = np.arange(counts.sum()) + np.repeat(low - group_start, counts)
+    return preference, position
+
+
+def synthetic_times(preferences, slots, seed=5):
+    """
+    Epoch seconds of slot starts on a 5-minute grid (several slots share a
+    start) and of preferences on the same grid, so a share of them hits no slot.
+    """
+    rng = random.Random(seed)
+    base = int(BASE.timestamp())
+    grid = max(slots // 3, 1)
+    slot_starts = [base + 300 * rng.randrange(grid) for _ in range(slots)]
+    preferred = [base + 300 * rng.randrange(grid) for _ in range(preferences)]
+    return slot_starts, preferred
+
+
+def timed(label, work):
+    started = time.perf_counter()
+    result = work()
+    print(f"  {label:<44} {time.perf_counter() - started:8.2f} s")
+    return result
+
+
+def compare(slot_starts, preferred, tolerance_minutes):
+    import numpy as np
+
+    print(f"{len(preferred)} preferences x {len(slot_starts)} slots")
+
+    def dict_exact():
+        slots_at = defaultdict(list)
+        for slot_id, start_time in enumerate(slot_starts):
+            slots_at[start_time].append(slot_id)
+        return sum(len(slots_at.get(time_slot, ())) for time_slot in preferred)
+
+    def bisect_window():
+        window = int(tolerance_minutes * 60)
+        starts = sorted(slot_starts)
+        return sum(
+            bisect_right(starts, time_slot + window) - bisect_left(starts, time_slot - window)
+            for time_slot in preferred
+        )
+
+    def vectorized(tolerance_seconds):
+        starts = np.sort(np.array(slot_starts, dtype=np.int64))
+        preference, _ = resolve_preferences(np.array(preferred, dtype=np.int64), starts, tolerance_seconds)
+        return len(preference)
+
+    exact = timed("exact, dict lookup per preference", dict_exact)
+    assert timed("exact, searchsorted", lambda: vectorized(0)) == exact
+    window = timed(f"+-{tolerance_minutes:g} min, bisect per preference", bisect_window)
+    assert timed(f"+-{tolerance_minutes:g} min, searchsorted", lambda: vectorized(int(tolerance_minutes * 60))) == window
+    print(f"  {exact} exact matches, {window} within the window")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preferences", type=int, default=1_000_000)
+    parser.add_argument("--slots", type=int, default=200_000)
+    parser.add_argument("--tolerance-minutes", type=float, default=15)
+    args = parser.parse_args()
+
+    slot_starts, preferred = synthetic_times(args.preferences, args.slots)
+    compare(slot_starts, preferred, args.tolerance_minutes)
+
+
+if __name__ == "__main__":
+    main()
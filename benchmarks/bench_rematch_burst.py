@@ -0,0 +1,162 @@
+"""
+End-of-term burst: 50 students join waitlists and 50 others cancel their
+meetings at once, against a real uvicorn server. Reports request latency,
+how many matching passes ran and how long until every proposal was made.
+
+With the rematch worker the routes only enqueue, and the worker runs one pass
+per debounced batch. Point --app-dir at a checkout without it to compare with
+matching inside every request:
+
+    python -m benchmarks.bench_rematch_burst [--slots 1000] [--joins 50] [--cancels 50]
+    python -m benchmarks.bench_rematch_burst --app-dir /path/to/other/checkout
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.common import bearer_headers, percentile
+from benchmarks.load_test import REPO_ROOT, start_server, wait_until_up
+
+
+def seed(slots, joins, cancels):
+    """
+    A professor with `slots` booked slots; every occupant prefers three random
+    times. Returns (joins as (user_id, slot_id), cancels as (user_id, meeting_id)).
+    """
+    from sqlalchemy import insert, select
+
+    from app.auth.models import Meeting, PreferredTime, SlotTime, User
+    from app.db import SessionLocal
+
+    rng = random.Random(11)
+    first = datetime(2030, 1, 7, 9)
+    times = [first + timedelta(minutes=15 * i) for i in range(slots)]
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"name": "prof", "email": "prof@example.com", "password": "x", "role": "professor"}])
+        db.execute(insert(User), [
+            {"name": f"student {i}", "email": f"student{i}@example.com", "password": "x", "role": "student"}
+            for i in range(slots + joins)
+        ])
+        # Occupants are users 2 .. slots + 1, joiners the ones after
+        db.execute(insert(SlotTime), [
+            {"professor_id": 1, "start_time": start_time, "end_time": start_time + timedelta(minutes=15),
+             "is_booked": True}
+            for start_time in times
+        ])
+        db.execute(insert(Meeting), [
+            {"slot_id": i + 1, "student_id": i + 2, "professor_id": 1, "meeting_details": "seed"}
+            for i in range(slots)
+        ])
+        db.execute(insert(PreferredTime), [
+            {"user_id": user_id, "time_slot": time_slot}
+            for user_id in range(2, slots + joins + 2)
+            for time_slot in rng.sample(times, 3)
+        ])
+        db.commit()
+        meeting_ids = dict(db.execute(select(Meeting.slot_id, Meeting.id)).all())
+
+    slot_ids = list(range(1, slots + 1))
+    rng.shuffle(slot_ids)
+    join_slots, cancel_slots = slot_ids[:joins], slot_ids[joins:joins + cancels]
+    return (
+        [(slots + 2 + i, slot_id) for i, slot_id in enumerate(join_slots)],
+        [(slot_id + 1, meeting_ids[slot_id]) for slot_id in cancel_slots],
+    )
+
+
+async def burst(client, requests):
+    latencies = []
+    errors = Counter()
+
+    async def timed(method, url, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            errors[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(*request[:2], **request[2]) for request in requests))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run(base_url, joins, cancels):
+    professor = bearer_headers(1, "professor")
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        started = time.perf_counter()
+        join_ms, join_errors, join_s = await burst(client, [
+            ("POST", "/api/auth/add_to_waitlist", {"json": {"slot_id": slot_id}, "headers": bearer_headers(user_id, "student")})
+            for user_id, slot_id in joins
+        ])
+        cancel_ms, cancel_errors, cancel_s = await burst(client, [
+            ("DELETE", f"/api/auth/student/meetings/{meeting_id}", {"headers": bearer_headers(user_id, "student")})
+            for user_id, meeting_id in cancels
+        ])
+
+        # Matching is done when the worker has drained its queue (immediately without a worker)
+        while True:
+            rematch = (await client.get("/api/auth/admin/stats", headers=professor)).json().get("rematch")
+            if rematch is None or (rematch["events"] >= len(joins) + len(cancels) and rematch["queue_depth"] == 0):
+                break
+            await asyncio.sleep(0.05)
+        settled_s = time.perf_counter() - started
+    return (join_ms, join_errors, join_s), (cancel_ms, cancel_errors, cancel_s), settled_s, rematch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=REPO_ROOT)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--slots", type=int, default=1000)
+    parser.add_argument("--joins", type=int, default=50)
+    parser.add_argument("--cancels", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="meetly-rematch-")
+    database_url = f"sqlite:///{tmpdir}/meetly.db"
+    os.environ.update(DATABASE_URL=database_url, SECRET_KEY=os.environ.get("SECRET_KEY", "load-test"),
+                      ALGORITHM=os.environ.get("ALGORITHM", "HS256"))
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    joins, cancels = seed(args.slots, args.joins, args.cancels)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    log_path = os.path.join(tmpdir, "server.log")
+    with open(log_path, "w") as log_file:
+        server = start_server(os.path.abspath(args.app_dir), args.port, database_url, log_file)
+        try:
+            asyncio.run(wait_until_up(base_url))
+            join, cancel, settled_s, rematch = asyncio.run(run(base_url, joins, cancels))
+        finally:
+            server.terminate()
+            server.wait()
+
+    from sqlalchemy import func, select
+
+    from app.auth.models import RescheduleRequest
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        proposals = db.execute(select(func.count()).select_from(RescheduleRequest)).scalar()
+
+    print(f"{args.joins} waitlist joins + {args.cancels} cancellations, {args.slots} booked slots "
+          f"(server log: {log_path})")
+    for name, (latencies, errors, elapsed) in (("joins", join), ("cancellations", cancel)):
+        print(f"  {name:<14} burst {elapsed * 1000:8.0f} ms   p50 {percentile(latencies, 50):7.1f} ms"
+              f"   p99 {percentile(latencies, 99):7.1f} ms   errors {dict(errors) or 0}")
+    print(f"  all proposals made {settled_s * 1000:8.0f} ms after the burst started, {proposals} reschedule requests")
+    if rematch is None:
+        print("  matching ran inside every request (no rematch worker)")
+    else:
+        print(f"  {rematch['passes']} matching passes for {rematch['events']} events, "
+              f"avg {rematch['avg_pass_ms']} ms, max {rematch['max_pass_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
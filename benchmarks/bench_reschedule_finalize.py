@@ -0,0 +1,103 @@
+"""
+Cost of finalizing a reschedule chain (finalize_reschedule_move) as the chain
+grows: wall time and SQL statements for chains of 2 to 200 moves. Each chain
+is N students shifting one slot along N + 1 consecutive slots, with a
+waitlisted student taking the first slot. Every student of the chain has an
+unread notification about the request (and an initialised unread counter),
+which finalizing deletes.
+
+    python -m benchmarks.bench_reschedule_finalize [--lengths 2,10,50,200] [--repeat 5]
+    python -m benchmarks.bench_reschedule_finalize --app-dir /path/to/other/checkout
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def seed_chain(db, length):
+    """
+    Users, slots, meetings, notifications and a pending request for one chain;
+    returns the request.
+    """
+    from sqlalchemy import insert, select
+
+    from app.auth.models import (
+        Meeting, Notification, NotificationCounter, RescheduleMove, RescheduleRequest, SlotTime, User, WaitList,
+    )
+
+    professor_id = db.execute(
+        insert(User).returning(User.id),
+        [{"name": "prof", "email": f"prof-{time.perf_counter_ns()}@example.com", "password": "x", "role": "professor"}],
+    ).scalar_one()
+    students = db.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [
+            {"name": f"student {i}", "email": f"s{i}-{time.perf_counter_ns()}@example.com", "password": "x", "role": "student"}
+            for i in range(length + 1)
+        ],
+    ).scalars().all()
+    first = datetime(2030, 1, 7, 9) + timedelta(days=professor_id)
+    slots = db.execute(
+        insert(SlotTime).returning(SlotTime.id, sort_by_parameter_order=True),
+        [
+            {"professor_id": professor_id, "start_time": first + timedelta(minutes=15 * i),
+             "end_time": first + timedelta(minutes=15 * i + 15), "is_booked": i < length}
+            for i in range(length + 1)
+        ],
+    ).scalars().all()
+    db.execute(insert(Meeting), [
+        {"slot_id": slots[i], "student_id": students[i], "professor_id": professor_id} for i in range(length)
+    ])
+    db.add(WaitList(slot_id=slots[0], user_id=students[length]))
+    res_req = RescheduleRequest(status="Pending")
+    db.add(res_req)
+    db.flush()
+    db.execute(insert(RescheduleMove), [
+        {"request_id": res_req.id, "position": i, "user_id": students[i], "current_slot_id": slots[i],
+         "new_slot_id": slots[i + 1], "professor_id": professor_id}
+        for i in range(length)
+    ])
+    db.execute(insert(Notification), [
+        {"user_id": students[i], "message": "Reschedule request", "reschedule_id": res_req.id}
+        for i in range(length)
+    ])
+    db.execute(insert(NotificationCounter), [{"user_id": students[i], "unread": 1} for i in range(length)])
+    db.commit()
+    return db.execute(select(RescheduleRequest).where(RescheduleRequest.id == res_req.id)).scalar_one()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", default="2,5,10,25,50,100,200")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--app-dir", help="run against the app package of another checkout")
+    args = parser.parse_args()
+    if args.app_dir:
+        sys.path.insert(0, args.app_dir)
+
+    from benchmarks.common import QueryCounter, use_temp_app_database
+
+    use_temp_app_database()
+
+    from app.auth.routes import finalize_reschedule_move
+    from app.db import SessionLocal, engine
+
+    print(f"{'moves':>6} {'ms (median)':>12} {'statements':>11}")
+    for length in (int(value) for value in args.lengths.split(",")):
+        times, statements = [], []
+        for _ in range(args.repeat):
+            with SessionLocal() as db:
+                res_req = seed_chain(db, length)
+                with QueryCounter(engine) as queries:
+                    started = time.perf_counter()
+                    seated_user_id = finalize_reschedule_move(res_req, db)
+                    times.append((time.perf_counter() - started) * 1000)
+                statements.append(queries.count)
+                assert seated_user_id is not None, "the waitlisted student was not seated"
+        print(f"{length:>6} {statistics.median(times):>12.2f} {statistics.median(statements):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Calendar slot feed: what one month view costs with the unscoped /get_slots
+(every slot in the database) vs. a [start, end) range and the per-day
+aggregate the calendar uses, on a database of N slots spread over years.
+
+    python -m benchmarks.bench_slot_feed [slots]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import bearer_headers, use_temp_app_database
+
+SLOTS_PER_DAY = 16
+MONTH_START = datetime(2026, 3, 1)
+
+
+def main():
+    slot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    use_temp_app_database()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert, select, text
+
+    from app.auth.models import SlotTime, User
+    from app.db import SessionLocal, engine
+    from app.main import app
+
+    with SessionLocal() as db:
+        db.execute(insert(User).values(name="prof", email="prof@example.com", password="x", role="professor"))
+        first_day = MONTH_START - timedelta(days=slot_count // SLOTS_PER_DAY // 2)
+        rows = []
+        for i in range(slot_count):
+            start = first_day + timedelta(days=i // SLOTS_PER_DAY, minutes=30 * (i % SLOTS_PER_DAY))
+            rows.append({"professor_id": 1, "start_time": start,
+                         "end_time": start + timedelta(minutes=30), "is_booked": i % 3 == 0})
+        db.execute(insert(SlotTime), rows)
+        db.commit()
+
+    headers = bearer_headers(1, "professor")
+    # A month view spans six weeks, like FullCalendar's fetchInfo
+    month = {"start": "2026-02-22T00:00:00+01:00", "end": "2026-04-05T00:00:00+01:00"}
+
+    print(f"{slot_count} slots; one month view:")
+    with TestClient(app) as client:
+        for name, params in (
+            ("all slots (old)", {}),
+            ("range", month),
+            ("range + aggregate=day", {**month, "aggregate": "day"}),
+        ):
+            client.get("/api/auth/get_slots", params=params, headers=headers)  # warm up
+            started = time.perf_counter()
+            response = client.get("/api/auth/get_slots", params=params, headers=headers)
+            elapsed = time.perf_counter() - started
+            print(f"  {name:<22} {elapsed * 1000:8.1f} ms  {len(response.content):>11,} bytes  "
+                  f"{len(response.json()):>7} items")
+
+    compiled = select(SlotTime.id).where(
+        SlotTime.start_time >= datetime(2026, 2, 22), SlotTime.start_time < datetime(2026, 4, 5)
+    ).compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    print("plan:", "; ".join(row[-1] for row in plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Day-click lookup on a large slot table: the old `start_time LIKE 'YYYY-MM-DD%'`
+filter vs. the /get_slots_by_date route's [day, day + 1) range, with and
+without professor_id, and a keyset-paginated page. Prints the SQLite
+EXPLAIN QUERY PLAN of the statement each variant actually ran.
+
+    python -m benchmarks.bench_slots_by_date [slots]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import bearer_headers, use_temp_app_database
+
+PROFESSORS = 50
+SLOTS_PER_DAY = 400         # across all professors
+DAY = "2026-03-10"
+REPEAT = 20
+
+
+def seed(SessionLocal, slot_count):
+    from sqlalchemy import insert
+
+    from app.auth.models import SlotTime, User
+
+    with SessionLocal() as db:
+        db.execute(insert(User), [
+            {"name": f"prof {i}", "email": f"prof{i}@example.com", "password": "x", "role": "professor"}
+            for i in range(1, PROFESSORS + 1)
+        ])
+        first_day = datetime(2026, 3, 10) - timedelta(days=slot_count // SLOTS_PER_DAY // 2)
+        batch = []
+        for i in range(slot_count):
+            start = first_day + timedelta(days=i // SLOTS_PER_DAY, minutes=2 * (i % SLOTS_PER_DAY))
+            batch.append({"professor_id": 1 + i % PROFESSORS, "start_time": start,
+                          "end_time": start + timedelta(minutes=30), "is_booked": i % 3 == 0})
+            if len(batch) == 50_000:
+                db.execute(insert(SlotTime), batch)
+                batch = []
+        if batch:
+            db.execute(insert(SlotTime), batch)
+        db.commit()
+
+
+def query_plan(engine, statement, parameters):
+    with engine.connect() as conn:
+        cursor = conn.connection.cursor()
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        cursor.close()
+    return "; ".join(row[-1] for row in rows)
+
+
+def timed(fn):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn()
+    return (time.perf_counter() - started) / REPEAT * 1000, result
+
+
+def main():
+    slot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    use_temp_app_database()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.auth.models import SlotTime
+    from app.db import SessionLocal, async_engine, engine
+    from app.main import app
+
+    started = time.perf_counter()
+    seed(SessionLocal, slot_count)
+    print(f"seeded {slot_count} slots in {time.perf_counter() - started:.0f}s")
+
+    # The statement the route ran last, to EXPLAIN it afterwards
+    last_statement = {}
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM slot_times" in statement:
+            last_statement.update(statement=statement, parameters=parameters)
+
+    def legacy():
+        with SessionLocal() as db:
+            return db.query(SlotTime).filter(SlotTime.start_time.startswith(DAY)).all()
+
+    ms, rows = timed(legacy)
+    compiled = SessionLocal().query(SlotTime).filter(SlotTime.start_time.startswith(DAY)).statement.compile(engine)
+    print(f"{'LIKE (old)':<28} {ms:8.2f} ms  {len(rows):4} rows  plan: "
+          f"{query_plan(engine, str(compiled), tuple(compiled.params.values()))}")
+
+    headers = bearer_headers(1, "professor")
+    with TestClient(app) as client:
+        def route(**params):
+            return lambda: client.get("/api/auth/get_slots_by_date",
+                                      params={"date": DAY, **params}, headers=headers).json()
+
+        first_page = route(limit=50)()
+        last = first_page[-1]
+        for name, params in (
+            ("range", {}),
+            ("range + professor_id", {"professor_id": 7}),
+            ("range, page 1 (limit=50)", {"limit": 50}),
+            ("range, page 2 (keyset)", {"limit": 50, "after_start": last["start_time"], "after_id": last["id"]}),
+        ):
+            ms, rows = timed(route(**params))
+            plan = query_plan(engine, last_statement["statement"], last_statement["parameters"])
+            print(f"{name:<28} {ms:8.2f} ms  {len(rows):4} rows  plan: {plan}")
+
+
+if __name__ == "__main__":
+    main()
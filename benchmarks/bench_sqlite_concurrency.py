@@ -0,0 +1,128 @@
+"""
+Read latency while bookings commit concurrently, with SQLite's default settings
+vs. the production profile of app.db (WAL, synchronous=NORMAL, busy timeout,
+mmap, cache size, bounded pool).
+
+Reader threads run the /slots query in a loop while writer threads book slots
+(update slot + insert meeting + commit), like book_slot does.
+
+The production profile's gain is on the write side (bookings/s); readers
+rarely wait for a commit even with the default rollback journal, so read
+throughput and latency come out about the same under both profiles.
+
+    python -m benchmarks.bench_sqlite_concurrency [seconds] [readers] [writers]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+# app.db reads DATABASE_URL at import time; the benchmark only needs its helpers
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.auth.models import Meeting, SlotTime, User
+from benchmarks.common import percentile, temp_database
+
+SLOTS = 20_000
+START = datetime(2025, 1, 6, 8)
+STUDENTS = 200
+# Work done inside the write transaction before commit (matching, notifications, ...)
+HOLD_SECONDS = 0.002
+
+
+def seed(Session):
+    with Session() as db:
+        db.execute(insert(User), [
+            {"name": f"user {i}", "email": f"user{i}@example.com",
+             "password": "x", "role": "student" if i else "professor"}
+            for i in range(STUDENTS + 1)
+        ])
+        db.execute(insert(SlotTime), [
+            {"professor_id": 1, "start_time": START + timedelta(minutes=15 * i),
+             "end_time": START + timedelta(minutes=15 * (i + 1)), "is_booked": False}
+            for i in range(SLOTS)
+        ])
+        db.commit()
+
+
+def reader(Session, stop, latencies, errors):
+    rng = random.Random(threading.get_ident())
+    query = select(SlotTime.id, SlotTime.start_time, SlotTime.end_time, SlotTime.is_booked)
+    while not stop.is_set():
+        # One week of the calendar, like the FullCalendar view asks for
+        week_start = START + timedelta(minutes=15 * rng.randrange(SLOTS))
+        window = query.where(SlotTime.start_time.between(week_start, week_start + timedelta(days=7)))
+        started = time.perf_counter()
+        try:
+            with Session() as db:
+                db.execute(window).all()
+        except OperationalError as exc:
+            errors[str(exc.orig)] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def writer(Session, stop, slot_ids, commits, errors):
+    for slot_id in slot_ids:
+        if stop.is_set():
+            return
+        student_id = 2 + slot_id % STUDENTS
+        try:
+            with Session() as db:
+                db.execute(update(SlotTime).where(SlotTime.id == slot_id).values(is_booked=True))
+                db.execute(insert(Meeting).values(
+                    slot_id=slot_id, student_id=student_id, professor_id=1
+                ))
+                time.sleep(HOLD_SECONDS)
+                db.commit()
+            commits.append(slot_id)
+        except OperationalError as exc:
+            errors[str(exc.orig)] += 1
+
+
+def run(sqlite_profile, seconds, readers, writers):
+    with temp_database(sqlite_profile=sqlite_profile) as (engine, Session):
+        seed(Session)
+        stop = threading.Event()
+        latencies, commits, errors = [], [], Counter()
+        threads = [
+            threading.Thread(target=reader, args=(Session, stop, latencies, errors))
+            for _ in range(readers)
+        ] + [
+            threading.Thread(
+                target=writer,
+                args=(Session, stop, range(1 + i, SLOTS + 1, writers), commits, errors),
+            )
+            for i in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return latencies, commits, errors
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    print(f"{SLOTS} slots, {readers} readers, {writers} writers, {seconds:.0f}s per profile")
+    for name, sqlite_profile in (("default", False), ("production", True)):
+        latencies, commits, errors = run(sqlite_profile, seconds, readers, writers)
+        ms = [latency * 1000 for latency in latencies] or [0]
+        print(f"{name:>10}: {len(latencies) / seconds:6.0f} reads/s  "
+              f"read ms p50 {percentile(ms, 50):6.1f}  p99 {percentile(ms, 99):7.1f}  "
+              f"max {max(ms):7.1f}  |  {len(commits) / seconds:5.0f} bookings/s  "
+              f"errors: {dict(errors) or 0}")
+
+
+if __name__ == "__main__":
+    main()
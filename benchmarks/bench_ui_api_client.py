@@ -0,0 +1,102 @@
+"""
+Per-click latency of a NiceGUI page calling the API three ways:
+
+  - new client per call (old): `async with httpx.AsyncClient()` to 127.0.0.1
+  - pooled keep-alive: the app-lifetime client of app.ui.api in "http" mode
+  - in-process: the same client over httpx.ASGITransport ("asgi" mode, default)
+
+The HTTP variants hit a uvicorn server running the same app in this process.
+
+    python -m benchmarks.bench_ui_api_client [clicks]
+"""
+import asyncio
+import sys
+import threading
+import time
+
+from benchmarks.common import bearer_headers, percentile, use_temp_app_database
+
+PORT = 8766
+
+
+def start_server(app):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def measure(click, clicks):
+    await click()  # warm up
+    latencies = []
+    for _ in range(clicks):
+        started = time.perf_counter()
+        await click()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def run(app, clicks, headers):
+    import httpx
+
+    base_url = f"http://127.0.0.1:{PORT}"
+    path = "/api/auth/student/meetings"
+
+    async def new_client_per_call():
+        async with httpx.AsyncClient() as client:
+            response = await client.get(base_url + path, headers=headers)
+        response.raise_for_status()
+
+    pooled = httpx.AsyncClient(
+        base_url=base_url, limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
+    in_process = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=base_url)
+
+    async def pooled_call():
+        (await pooled.get(path, headers=headers)).raise_for_status()
+
+    async def in_process_call():
+        (await in_process.get(path, headers=headers)).raise_for_status()
+
+    results = {}
+    for name, click in (
+        ("new client per call (old)", new_client_per_call),
+        ("pooled keep-alive", pooled_call),
+        ("in-process (ASGI)", in_process_call),
+    ):
+        results[name] = await measure(click, clicks)
+    await pooled.aclose()
+    await in_process.aclose()
+    return results
+
+
+def main():
+    clicks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    use_temp_app_database()
+
+    from app.auth.models import User
+    from app.db import SessionLocal
+    from app.main import app
+
+    with SessionLocal() as db:
+        db.add(User(name="student", email="student@example.com", password="x", role="student"))
+        db.commit()
+
+    server, thread = start_server(app)
+    try:
+        results = asyncio.run(run(app, clicks, bearer_headers(1, "student")))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    print(f"{clicks} sequential clicks (GET /api/auth/student/meetings):")
+    for name, ms in results.items():
+        print(f"  {name:<26} p50 {percentile(ms, 50):6.2f} ms  p99 {percentile(ms, 99):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
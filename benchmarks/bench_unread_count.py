@@ -0,0 +1,81 @@
+"""
+Notification badge for a user with a long history: loading the history
+and counting unread rows in Python, a COUNT(*) of the unread rows (through the
+user_id/is_read index) and the notification_counters lookup the /unread_count
+route serves. Prints the
+SQLite EXPLAIN QUERY PLAN of each statement.
+
+    python -m benchmarks.bench_unread_count [notifications] [unread_percent]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.auth.models import Notification, NotificationCounter, User
+from benchmarks.common import temp_database
+
+USERS = 20
+REPEAT = 50
+
+
+def seed(Session, notification_count, unread_percent):
+    with Session() as db:
+        db.execute(insert(User), [
+            {"name": f"user {i}", "email": f"user{i}@example.com", "password": "x", "role": "student"}
+            for i in range(1, USERS + 1)
+        ])
+        started = datetime(2025, 1, 1)
+        batch = []
+        for i in range(notification_count):
+            batch.append({"user_id": 1 + i % USERS, "message": f"notification {i}",
+                          "is_read": i // USERS % 100 >= unread_percent,
+                          "created_at": started + timedelta(seconds=i), "reschedule_id": None})
+            if len(batch) == 50_000:
+                db.execute(insert(Notification), batch)
+                batch = []
+        if batch:
+            db.execute(insert(Notification), batch)
+        db.execute(insert(NotificationCounter).from_select(
+            ["user_id", "unread"],
+            select(Notification.user_id, func.count()).where(Notification.is_read == False)
+            .group_by(Notification.user_id),
+        ))
+        db.commit()
+
+
+def main():
+    notification_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    unread_percent = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    with temp_database() as (engine, Session):
+        seed(Session, notification_count, unread_percent)
+        print(f"{notification_count} notifications over {USERS} users, {unread_percent}% unread")
+
+        user_id = 7
+        history = select(Notification.id, Notification.is_read).where(Notification.user_id == user_id)
+        unread = select(func.count()).select_from(Notification).where(
+            Notification.user_id == user_id, Notification.is_read == False
+        )
+        counter = select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+        variants = (
+            # What the badge could only do before: load the history and count in Python
+            ("full history (old)", history, lambda rows: sum(not row.is_read for row in rows)),
+            ("COUNT(*) unread", unread, lambda rows: rows.scalar_one()),
+            ("notification_counters", counter, lambda rows: rows.scalar_one()),
+        )
+        with engine.connect() as conn:
+            for name, statement, count_of in variants:
+                count = count_of(conn.execute(statement))
+                started = time.perf_counter()
+                for _ in range(REPEAT):
+                    count_of(conn.execute(statement))
+                ms = (time.perf_counter() - started) / REPEAT * 1000
+                sql = statement.compile(engine, compile_kwargs={"literal_binds": True})
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+                print(f"{name:<24} {ms:8.3f} ms  count {count:6}  plan: {'; '.join(row[-1] for row in plan)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Waitlist promotion after a cancellation: the old per-entry search (one BFS
+from every waitlisted student, in FIFO order, each on a fresh copy of the
+assignment) vs. one backward search from the freed slot
+(MatchingIndex.promotion_chains).
+
+The graph has a strongly connected "busy" region of booked slots whose
+occupants only want each other's times, and a chain of booked slots leading
+to the freed slot. Every waitlisted student waits for a busy slot, except
+(in the "chain" case) the last one, who waits for the head of the chain.
+
+    python -m benchmarks.bench_waitlist_promotion [--waitlist 5000] [--busy-slots 2000] [--chain 50]
+"""
+import argparse
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from benchmarks.common import use_temp_app_database
+
+
+def build(busy_slots, chain_length, waitlist_size, reachable):
+    """
+    Returns (index, freed_slot_id, waitlist) with waitlist as FIFO-ordered (user_id, slot_id).
+    """
+    from app.auth.matching_index import MatchingIndex
+
+    rng = random.Random(7)
+    index = MatchingIndex()
+    first = datetime(2030, 1, 7, 9)
+    next_id = iter(range(1, 10**9))
+
+    def new_slot(start_time, occupant=None):
+        slot_id = next(next_id)
+        index.add_slot(slot_id, start_time, occupant)
+        return slot_id
+
+    def new_student(*times):
+        user_id = next(next_id)
+        index.add_student(user_id)
+        for time_slot in times:
+            index.add_preference(user_id, time_slot)
+        return user_id
+
+    busy_times = [first + timedelta(minutes=15 * i) for i in range(busy_slots)]
+    busy = []
+    for start_time in busy_times:
+        occupant = new_student(*rng.sample(busy_times, 3))
+        busy.append(new_slot(start_time, occupant))
+
+    chain_times = [first - timedelta(days=1, minutes=15 * i) for i in range(chain_length + 1)]
+    chain = []
+    for i in range(chain_length):
+        # Occupant i could move to the next slot of the chain
+        chain.append(new_slot(chain_times[i], new_student(chain_times[i + 1])))
+    freed_slot_id = new_slot(chain_times[chain_length])
+
+    waitlist = [(new_student(*rng.sample(busy_times, 3)), rng.choice(busy)) for _ in range(waitlist_size - 1)]
+    if reachable:
+        waitlist.append((new_student(chain_times[0]), chain[0]))
+    return index, freed_slot_id, waitlist
+
+
+def legacy_single_user_bfs(user_id, user_to_slots, slot_to_user):
+    """
+    The old promotion search (try_single_user_bfs_in_memory): BFS from one
+    waitlisted student to any free slot. Mutates slot_to_user; returns it, or
+    None if no chain was found.
+    """
+
+    # 1) BFS over the adjacency we were given
+    visited_users = set()
+    visited_slots = set()
+    predecessor = {}
+    queue = deque()
+    queue.append(("U", user_id))
+    visited_users.add(user_id)
+
+    free_slot_found = None
+
+    while queue and (free_slot_found is None):
+        node_type, node_id = queue.popleft()
+        if node_type == "U":
+            # BFS outward from a user node
+            for slot_id in user_to_slots.get(node_id, []):
+                if slot_id in visited_slots:
+                    continue
+
+                occupant = slot_to_user.get(slot_id)
+                if occupant is None:
+                    # Found a free slot => BFS success
+                    predecessor[("S", slot_id)] = ("U", node_id)
+                    free_slot_found = slot_id
+                    break
+                else:
+                    # Slot is occupied => attempt to displace occupant
+                    predecessor[("S", slot_id)] = ("U", node_id)
+                    visited_slots.add(slot_id)
+
+                    if occupant not in visited_users:
+                        visited_users.add(occupant)
+                        predecessor[("U", occupant)] = ("S", slot_id)
+                        queue.append(("U", occupant))
+
+    if free_slot_found is None:
+        # No augmenting path
+        return None
+
+    # 2) Reconstruct path in memory & flip occupant edges
+    cur_node = ("S", free_slot_found)
+    while cur_node in predecessor:
+        prev_node = predecessor[cur_node]
+        if cur_node[0] == "S" and prev_node[0] == "U":
+            occupant_user = prev_node[1]
+            slot_to_user[cur_node[1]] = occupant_user
+            cur_node = prev_node
+        elif cur_node[0] == "U" and prev_node[0] == "S":
+            old_slot_id = prev_node[1]
+            slot_to_user[old_slot_id] = None
+            cur_node = prev_node
+
+    # 3) Return the new occupant arrangement in memory
+    return slot_to_user
+
+
+def per_entry_search(index, freed_slot_id, waitlist):
+    user_to_slots, slot_to_user = index.snapshot()
+    for user_id, _ in waitlist:
+        if legacy_single_user_bfs(user_id, user_to_slots, dict(slot_to_user)) is not None:
+            return user_id
+    return None
+
+
+def backward_search(index, freed_slot_id, waitlist):
+    waitlist_heads = {}
+    for rank, (user_id, slot_id) in enumerate(waitlist):
+        waitlist_heads.setdefault(slot_id, (rank, user_id))
+    promotions = index.promotion_chains(waitlist_heads)
+    return promotions[0][0] if promotions else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--waitlist", type=int, default=5000)
+    parser.add_argument("--busy-slots", type=int, default=2000)
+    parser.add_argument("--chain", type=int, default=50)
+    args = parser.parse_args()
+    use_temp_app_database()
+
+    print(f"{args.waitlist} waitlist entries, {args.busy_slots} busy slots, chain of {args.chain}")
+    for reachable in (False, True):
+        index, freed_slot_id, waitlist = build(args.busy_slots, args.chain, args.waitlist, reachable)
+        results = {}
+        for name, search in (("per-entry BFS (old)", per_entry_search), ("backward search", backward_search)):
+            started = time.perf_counter()
+            promoted = search(index, freed_slot_id, waitlist)
+            results[name] = promoted
+            print(f"  {'chain' if reachable else 'no chain':<9} {name:<20} {(time.perf_counter() - started) * 1000:10.1f} ms"
+                  f"  promoted user {promoted}")
+        assert len(set(results.values())) == 1, "the searches promoted different students"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Startup-time budget check: fails (exit code 1) when importing app.main takes
+longer than IMPORT_TIME_BUDGET_MS, or when it pulls in a heavy optional
+dependency that should only load on first use.
+
+    IMPORT_TIME_BUDGET_MS=2000 python -m benchmarks.check_import_time
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+RUNS = int(os.getenv("IMPORT_TIME_RUNS", "3"))
+LAZY_MODULES = ("matplotlib", "networkx")
+
+PROBE = (
+    "import sys, app.main; "
+    f"print('LOADED:' + ','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure_once(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| app\.main$", result.stderr, re.MULTILINE)
+    loaded = re.search(r"^LOADED:(.*)$", result.stdout, re.MULTILINE).group(1)
+    loaded = [m for m in loaded.split(",") if m]
+    return int(match.group(1)) / 1000, loaded
+
+
+def main():
+    env = dict(os.environ)
+    tmpdir = tempfile.mkdtemp(prefix="meetly-importtime-")
+    env.setdefault("DATABASE_URL", f"sqlite:///{tmpdir}/meetly.db")
+    env.setdefault("SECRET_KEY", "import-time-check")
+    env.setdefault("ALGORITHM", "HS256")
+    env.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+    timings = []
+    loaded = []
+    for _ in range(RUNS):
+        elapsed_ms, loaded = measure_once(env)
+        timings.append(elapsed_ms)
+
+    best = min(timings)
+    print(f"app.main import: best {best:.0f} ms of {RUNS} runs (budget {BUDGET_MS:.0f} ms)")
+
+    failed = False
+    if best > BUDGET_MS:
+        print(f"FAIL: import time exceeds the budget by {best - BUDGET_MS:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"FAIL: heavy optional modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Run a benchmark from the repository root, e.g.:
+
+    python -m benchmarks.bench_preference_resolution
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.models import Base
+
+
+@contextmanager
+def temp_database(sqlite_profile=False):
+    """
+    Yield (engine, Session) for a throwaway SQLite file with the Meetly schema.
+    With sqlite_profile=True the engine is set up like app.db's production profile.
+    """
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="meetly-bench-")
+    os.close(fd)
+    url = f"sqlite:///{path}"
+    if sqlite_profile:
+        from app.db import apply_sqlite_profile, engine_options
+
+        engine = create_engine(url, **engine_options(url))
+        apply_sqlite_profile(engine)
+    else:
+        engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def use_temp_app_database():
+    """
+    Point app.db at a fresh SQLite file (call before importing anything from `app`
+    that touches app.db). Returns the file path.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="meetly-bench-"), "meetly.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+    return path
+
+
+def bearer_headers(user_id, role):
+    """
+    Authorization headers for a user, without going through /login.
+    """
+    from app.auth.routes import create_access_token
+
+    token = create_access_token({"sub": str(user_id), "role": role}, timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class QueryCounter:
+    """
+    Count the SQL statements an engine executes inside a `with` block.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timer(results, key):
+    """
+    Store the wall-clock seconds of the block in results[key].
+    """
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,144 @@
+"""
+HTTP load test: N concurrent clients hammering read endpoints of a real
+uvicorn server, reporting p50/p95/p99 latency and throughput.
+
+Starts `uvicorn app.main:app` from --app-dir against a throwaway SQLite
+database, so two checkouts (e.g. before/after a change) can be compared:
+
+    python -m benchmarks.load_test --clients 200
+    python -m benchmarks.load_test --app-dir /path/to/other/checkout --clients 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(app_dir, port, database_url, log_file, workers=1):
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=database_url,
+        SECRET_KEY=env.get("SECRET_KEY", "load-test"),
+        ALGORITHM=env.get("ALGORITHM", "HS256"),
+        ACCESS_TOKEN_EXPIRE_MINUTES=env.get("ACCESS_TOKEN_EXPIRE_MINUTES", "60"),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "120", "--workers", str(workers)],
+        cwd=app_dir, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_until_up(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/docs")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.25)
+    raise RuntimeError("server did not start")
+
+
+async def seed(base_url, slots):
+    """
+    Create a professor with `slots` slots and a student; return the student's login.
+    """
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        tokens = {}
+        for name, role in (("prof", "professor"), ("student", "student")):
+            await client.post("/api/auth/signup", json={
+                "name": name, "email": f"{name}@example.com", "password": "pw", "role": role,
+            })
+            response = await client.post("/api/auth/login", json={"email": f"{name}@example.com", "password": "pw"})
+            response.raise_for_status()
+            tokens[role] = response.json()
+
+        headers = {"Authorization": f"Bearer {tokens['professor']['access_token']}"}
+        for i in range(slots):
+            day, hour = divmod(i, 8)
+            start = f"2030-01-{1 + day % 28:02d}T{9 + hour:02d}:00"
+            end = f"2030-01-{1 + day % 28:02d}T{9 + hour:02d}:30"
+            await client.post("/api/auth/create_slot", json={"start": start, "end": end}, headers=headers)
+        return tokens["student"]
+
+
+async def run_load(base_url, student, clients, requests_per_client):
+    headers = {"Authorization": f"Bearer {student['access_token']}"}
+    paths = [
+        "/api/auth/get_slots",
+        f"/api/auth/notifications?user_id={student['user_id']}",
+    ]
+    latencies = []
+    errors = Counter()
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as client:
+        async def worker(worker_id):
+            for i in range(requests_per_client):
+                path = paths[(worker_id + i) % len(paths)]
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors[f"HTTP {response.status_code}"] += 1
+                except httpx.TransportError as exc:
+                    errors[type(exc).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, errors, elapsed
+
+
+async def main_async(args):
+    tmpdir = tempfile.mkdtemp(prefix="meetly-load-")
+    database_url = f"sqlite:///{tmpdir}/meetly.db"
+    base_url = f"http://127.0.0.1:{args.port}"
+    log_path = os.path.join(tmpdir, "server.log")
+    log_file = open(log_path, "w")
+    server = start_server(os.path.abspath(args.app_dir), args.port, database_url, log_file)
+    try:
+        await wait_until_up(base_url)
+        student = await seed(base_url, args.slots)
+        latencies, errors, elapsed = await run_load(base_url, student, args.clients, args.requests)
+    finally:
+        server.terminate()
+        server.wait()
+        log_file.close()
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f"app dir: {args.app_dir} (server log: {log_path})")
+    print(f"{args.clients} clients x {args.requests} requests, {args.slots} slots, "
+          f"errors: {dict(errors) or 0}")
+    print(f"throughput: {len(ms) / elapsed:.0f} req/s")
+    print(f"latency ms: p50 {percentile(ms, 50):.0f}  p95 {percentile(ms, 95):.0f}  "
+          f"p99 {percentile(ms, 99):.0f}  mean {statistics.mean(ms):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=REPO_ROOT)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--slots", type=int, default=200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Booking stress test: thousands of concurrent /book_slot calls from many
+students fighting over a small set of slots, against a real uvicorn server
+with several worker processes. Fails if any slot ends up with more than one
+meeting, or if slots.is_booked disagrees with the meetings table.
+
+    python -m benchmarks.stress_book_slot --bookings 5000 --slots 500 --concurrency 200 --workers 4
+    python -m benchmarks.stress_book_slot --app-dir /path/to/other/checkout
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.load_test import REPO_ROOT, start_server, wait_until_up
+
+
+def seed(students, slots):
+    from sqlalchemy import insert
+
+    from app.auth.models import SlotTime, User
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"name": "prof", "email": "prof@example.com", "password": "x", "role": "professor"}])
+        db.execute(insert(User), [
+            {"name": f"student {i}", "email": f"student{i}@example.com", "password": "x", "role": "student"}
+            for i in range(students)
+        ])
+        first = datetime(2030, 1, 7, 9)
+        db.execute(insert(SlotTime), [
+            {"professor_id": 1, "start_time": first + timedelta(minutes=30 * i),
+             "end_time": first + timedelta(minutes=30 * i + 30), "is_booked": False}
+            for i in range(slots)
+        ])
+        db.commit()
+    # Students are users 2 .. students + 1, slots 1 .. slots
+    return list(range(2, students + 2)), list(range(1, slots + 1))
+
+
+async def run(base_url, bookings, concurrency, student_ids, slot_ids):
+    from benchmarks.common import bearer_headers
+
+    headers = {student_id: bearer_headers(student_id, "student") for student_id in student_ids}
+    statuses = Counter()
+    winners = Counter()         # { slot_id: successful bookings }
+    gate = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def book(i):
+            student_id = student_ids[i % len(student_ids)]
+            slot_id = random.choice(slot_ids)
+            async with gate:
+                try:
+                    response = await client.post(
+                        "/api/auth/book_slot", headers=headers[student_id],
+                        json={"slot_id": slot_id, "meeting_purpose": "stress"},
+                    )
+                except httpx.TransportError as exc:
+                    statuses[type(exc).__name__] += 1
+                    return
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                winners[slot_id] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(book(i) for i in range(bookings)))
+        elapsed = time.perf_counter() - started
+    return statuses, winners, elapsed
+
+
+def check_database():
+    """
+    Return a list of invariant violations found in the database.
+    """
+    from sqlalchemy import func
+
+    from app.auth.models import Meeting, SlotTime
+    from app.db import SessionLocal
+
+    problems = []
+    with SessionLocal() as db:
+        doubles = db.query(Meeting.slot_id, func.count()).group_by(Meeting.slot_id).having(func.count() > 1).all()
+        if doubles:
+            problems.append(f"{len(doubles)} double-booked slots, e.g. {doubles[:5]}")
+        meetings = {slot_id for (slot_id,) in db.query(Meeting.slot_id)}
+        booked = {slot_id for (slot_id,) in db.query(SlotTime.id).filter(SlotTime.is_booked == True)}
+        if meetings != booked:
+            problems.append(f"is_booked out of step: {len(booked - meetings)} booked without a meeting, "
+                            f"{len(meetings - booked)} meetings on free slots")
+    return problems, len(meetings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=REPO_ROOT)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--slots", type=int, default=500)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="meetly-stress-")
+    database_url = f"sqlite:///{tmpdir}/meetly.db"
+    os.environ.update(DATABASE_URL=database_url, SECRET_KEY=os.environ.get("SECRET_KEY", "load-test"),
+                      ALGORITHM=os.environ.get("ALGORITHM", "HS256"))
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    student_ids, slot_ids = seed(args.students, args.slots)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    log_path = os.path.join(tmpdir, "server.log")
+    with open(log_path, "w") as log_file:
+        server = start_server(os.path.abspath(args.app_dir), args.port, database_url, log_file, workers=args.workers)
+        try:
+            asyncio.run(wait_until_up(base_url))
+            statuses, winners, elapsed = asyncio.run(
+                run(base_url, args.bookings, args.concurrency, student_ids, slot_ids)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    problems, meetings = check_database()
+    if sum(winners.values()) != meetings:
+        problems.append(f"{sum(winners.values())} successful responses but {meetings} meetings")
+    if any(count > 1 for count in winners.values()):
+        problems.append("a slot was reported booked to more than one student")
+
+    print(f"{args.bookings} bookings, {args.concurrency} in flight, {args.workers} workers, "
+          f"{args.slots} slots (server log: {log_path})")
+    print(f"responses: {dict(statuses)}")
+    print(f"throughput: {args.bookings / elapsed:.0f} bookings/s, {meetings} slots booked")
+    if problems:
+        print("FAILED:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("OK: no double bookings")
+
+
+if __name__ == "__main__":
+    main()